@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-keyword dispatch overhead of the library, measured by calling the
+``Click`` keyword against a no-op stand-in client so that only the
+wrapping around the keyword is timed.
+
+Compares the unwrapped method, the keyword wrapper of the library with
+and without keyword timing, and the former ``decorator`` based wrapper
+when the decorator package is installed. The libraries are imported with
+``log_level=NONE``, so the messages of the keyword are not formatted and
+logging does not dominate the timings.
+
+Usage: python benchmark/bench_dispatch.py [--calls N]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, "..", "src"))
+
+from LDTPLibrary import LDTPLibrary
+
+
+class _NoOpClient(object):
+
+    def click(self, window_name, object_name):
+        return 1
+
+
+def _legacy_run_on_failure_decorator(method, *args, **kwargs):
+    # The keyword wrapper used before the dispatch was compiled per keyword
+    self = args[0]
+    already_in_keyword = getattr(self, "_already_in_keyword", False)
+    self._already_in_keyword = True
+    try:
+        return method(*args, **kwargs)
+    except Exception:
+        if hasattr(self, '_run_on_failure') and not self._has_run_on_failure:
+            self._has_run_on_failure = True
+            self._run_on_failure()
+        raise
+    finally:
+        if not already_in_keyword:
+            self._already_in_keyword = False
+            self._has_run_on_failure = False
+
+
+def measure(call, calls):
+    start = time.time()
+    for _ in range(calls):
+        call('frmCalculator', 'btn1')
+    return (time.time() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the keyword dispatch overhead")
+    parser.add_argument('--calls', type=int, default=100000, help='calls per measurement')
+    args = parser.parse_args()
+
+    library = LDTPLibrary(pool_size=0, log_level='NONE')
+    library._client = _NoOpClient()
+    raw = LDTPLibrary.click.__wrapped__
+    results = {
+        'calls': args.calls,
+        'client_us': measure(library._client.click, args.calls),
+        'unwrapped_us': measure(raw.__get__(library, LDTPLibrary), args.calls),
+        'keyword_us': measure(library.click, args.calls),
+    }
+    timed = LDTPLibrary(pool_size=0, log_level='NONE', keyword_timing=True)
+    timed._client = _NoOpClient()
+    results['keyword_timed_us'] = measure(timed.click, args.calls)
+    try:
+        from decorator import decorator
+    except ImportError:
+        results['legacy_decorator_us'] = None
+    else:
+        legacy = decorator(_legacy_run_on_failure_decorator, raw)
+        results['legacy_decorator_us'] = measure(legacy.__get__(library, LDTPLibrary), args.calls)
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Listener dispatch cost over a long run, simulating tests that each call
+``Set Screenshot Directory`` and so register a handler for the end of
+their own scope, next to the suite end handlers every library registers.
+
+The per-test dispatch time of the first and the last thousand tests is
+reported for the event registry of the library and for the former list
+based registry, which kept every handler and scanned all of them on
+every dispatch. The former registry is quadratic, it only runs
+``--legacy-tests`` tests.
+
+Usage: python benchmark/bench_events.py [--tests N] [--legacy-tests N]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, "..", "src"))
+
+from LDTPLibrary.utils import events
+from LDTPLibrary.utils.events import ScopeEnd, SuiteEnd
+from LDTPLibrary.utils.librarylistener import LibraryListener
+
+WINDOW = 1000
+
+
+class _LegacyEvents(object):
+    """The list based registry used before events were indexed."""
+
+    def __init__(self):
+        self._events = []
+
+    def on(self, event_name, *args, **kwargs):
+        for event in (ScopeEnd, SuiteEnd):
+            if event.name == event_name:
+                self._events.append(event(*args, **kwargs))
+                return
+
+    def dispatch(self, event_name, *args, **kwargs):
+        for event in self._events:
+            if event.name == event_name:
+                event.trigger(*args, **kwargs)
+
+
+def _noop():
+    pass
+
+
+def simulate(on, start_test, end_test, tests):
+    for _ in range(3):
+        on('suite_end', _noop)
+    timings = []
+    for index in range(tests):
+        name = 'Suite.Test %d' % index
+        start = time.time()
+        start_test(name)
+        on('scope_end', name, _noop)
+        end_test(name)
+        timings.append(time.time() - start)
+    head = timings[:WINDOW]
+    tail = timings[-WINDOW:]
+    return {
+        'tests': tests,
+        'first_tests_us': sum(head) / len(head) * 1e6,
+        'last_tests_us': sum(tail) / len(tail) * 1e6,
+        'total_s': sum(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks listener event dispatch")
+    parser.add_argument('--tests', type=int, default=50000, help='tests to simulate')
+    parser.add_argument('--legacy-tests', type=int, default=5000,
+                        help='tests to simulate with the former registry')
+    args = parser.parse_args()
+
+    listener = LibraryListener()
+    results = {
+        'indexed': simulate(events.on,
+                            lambda name: listener.start_test(name, {'longname': name}),
+                            lambda name: listener.end_test(name, {'longname': name}),
+                            args.tests),
+        'indexed_pending_handlers': sum(len(handlers) for by_key in events._handlers.values()
+                                        for handlers in by_key.values()),
+    }
+    legacy = _LegacyEvents()
+    results['legacy'] = simulate(legacy.on,
+                                 lambda name: legacy.dispatch('scope_start', name),
+                                 lambda name: legacy.dispatch('scope_end', name),
+                                 args.legacy_tests)
+    results['legacy_pending_handlers'] = len(legacy._events)
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
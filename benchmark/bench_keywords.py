@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Keyword throughput of LDTPLibrary against the stand-in ldtpd of
+LDTPLibrary.utils.fakeldtpd, for representative workloads:
+
+- click: ``Click`` on a button
+- text_round_trip: ``Set Text Value`` followed by ``Get Text Value``
+- table_read: ``Get Table Snapshot`` of a 2500 x 4 table, i.e. 10k cells
+- object_lookup: ``Get Object List`` and ``Object Exist`` of a window
+- quick_wait: ``Wait Till Gui Exist`` of a window appearing after 20 ms
+- screenshot_on_failure: a failing ``Click`` capturing a screenshot
+
+Every workload reports operations per second, where an operation is one
+iteration of the workload, so the table read counts one per snapshot.
+Results are printed, and written with ``--output``, as JSON.
+
+Usage: python benchmark/bench_keywords.py [--latency S] [--iterations N] [--multicall] [--output FILE]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, "..", "src"))
+
+from LDTPLibrary import LDTPLibrary, VERSION
+from LDTPLibrary.utils.fakeldtpd import CALCULATOR, FakeDesktop, FakeLdtpServer
+
+WINDOW = 'frmCalculator'
+TABLE_ROWS = 2500
+TABLE_COLUMNS = 4
+
+
+def make_server(latency, launch_delay=0.0, multicall=False):
+    templates = dict(CALCULATOR)
+    templates[WINDOW] = dict(CALCULATOR[WINDOW], tblBig={
+        'role': 'table',
+        'rows': [['r%dc%d' % (row, column) for column in range(TABLE_COLUMNS)] for row in range(TABLE_ROWS)]})
+    templates['frmLate'] = {'btnOk': {'role': 'push_button'}}
+    desktop = FakeDesktop({WINDOW: templates[WINDOW]}, {'late-app': ['frmLate']},
+                          launch_delay=launch_delay, templates=templates)
+    return FakeLdtpServer(desktop, latency=latency, multicall=multicall).start()
+
+
+def make_library(server, **options):
+    return LDTPLibrary(ldtp_address=server.address, ldtp_port=server.port, **options)
+
+
+def run(name, iterations, operation):
+    start = time.time()
+    for _ in range(iterations):
+        operation()
+    elapsed = time.time() - start
+    return name, {'iterations': iterations, 'seconds': elapsed,
+                  'ops_per_second': iterations / elapsed if elapsed else None}
+
+
+def click(library, iterations):
+    return run('click', iterations, lambda: library.click(WINDOW, 'btn1'))
+
+
+def text_round_trip(library, iterations):
+    def operation():
+        library.set_text_value(WINDOW, 'txtResult', '42')
+        library.get_text_value(WINDOW, 'txtResult')
+    return run('text_round_trip', iterations, operation)
+
+
+def table_read(library, iterations):
+    return run('table_read', max(iterations // 100, 1),
+               lambda: library.get_table_snapshot(WINDOW, 'tblBig'))
+
+
+def object_lookup(library, iterations):
+    def operation():
+        library.get_object_list(WINDOW)
+        library.object_exist(WINDOW, 'btn5')
+    return run('object_lookup', iterations, operation)
+
+
+def quick_wait(library, server, iterations):
+    def operation():
+        library.launch_app('late-app')
+        if not library.wait_till_gui_exist('frmLate', gui_time_out=5):
+            raise RuntimeError('frmLate did not appear')
+        server.desktop.closewindow('frmLate')
+    return run('quick_wait', max(iterations // 20, 1), operation)
+
+
+def screenshot_on_failure(library, iterations):
+    # Stands in for run_on_failure=Capture Windows Screenshot, whose
+    # BuiltIn().run_keyword needs a running Robot Framework.
+    library._run_on_failure = lambda: library.capture_windows_screenshot(WINDOW)
+
+    def operation():
+        try:
+            library.click(WINDOW, 'btnMissing')
+        except Exception:
+            pass
+        else:
+            raise RuntimeError('Click on a missing button passed')
+    result = run('screenshot_on_failure', max(iterations // 10, 1), operation)
+    library.flush_screenshots()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks LDTPLibrary keyword throughput")
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the fake ldtpd adds to every call')
+    parser.add_argument('--iterations', type=int, default=1000, help='iterations of the cheap workloads')
+    parser.add_argument('--multicall', action='store_true',
+                        help='serve system.multicall, which ldtpd does not have')
+    parser.add_argument('--log-level', default='INFO', help='log_level of the library')
+    parser.add_argument('--output', help='JSON file to write the results to')
+    args = parser.parse_args()
+
+    server = make_server(args.latency, launch_delay=0.02, multicall=args.multicall)
+    screenshot_dir = tempfile.mkdtemp(prefix='ldtp-bench-')
+    options = {'log_level': args.log_level, 'screenshot_root_directory': screenshot_dir}
+    try:
+        library = make_library(server, **options)
+        cached = make_library(server, object_cache_ttl=5, **options)
+        workloads = [
+            click(library, args.iterations),
+            text_round_trip(library, args.iterations),
+            table_read(library, args.iterations),
+            object_lookup(library, args.iterations),
+            ('object_lookup_cached', object_lookup(cached, args.iterations)[1]),
+            quick_wait(library, server, args.iterations),
+            screenshot_on_failure(library, args.iterations),
+        ]
+    finally:
+        server.stop()
+        shutil.rmtree(screenshot_dir, ignore_errors=True)
+    results = {
+        'library_version': VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'latency': args.latency,
+        'multicall': args.multicall,
+        'workloads': dict(workloads),
+    }
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Startup time of the library: ``import LDTPLibrary`` and ``LDTPLibrary()``
+construction, each run in a fresh interpreter. Robot Framework is imported
+before the measurement, as it always is when libdoc, a dry run or a pabot
+worker loads the library, so the figures are the cost of the library itself.
+
+Neither step should connect to ldtpd, ``ldtp_imported`` tells whether the
+ldtp module got imported.
+
+Usage: python benchmark/bench_startup.py [--runs N]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(THIS_DIR, "..", "src")
+
+_PROBE = """
+import sys, time, json
+sys.path.insert(0, %r)
+import robot.api.deco
+start = time.time()
+import LDTPLibrary
+imported = time.time()
+LDTPLibrary.LDTPLibrary()
+constructed = time.time()
+print(json.dumps({'import': imported - start, 'construct': constructed - imported,
+                  'ldtp_imported': 'ldtp' in sys.modules}))
+"""
+
+
+def run_probe():
+    output = subprocess.check_output([sys.executable, '-c', _PROBE % SRC_DIR])
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the library startup time")
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters to start')
+    args = parser.parse_args()
+
+    probes = [run_probe() for _ in range(args.runs)]
+    results = {
+        'runs': args.runs,
+        'import_ms': median([probe['import'] for probe in probes]) * 1e3,
+        'construct_ms': median([probe['construct'] for probe in probes]) * 1e3,
+        'ldtp_imported': any(probe['ldtp_imported'] for probe in probes),
+    }
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
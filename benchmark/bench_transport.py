@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-call latency of the pooled LdtpClient transport against a connection
+per request, measured with a local stand-in ldtpd XML-RPC server.
+
+Usage: python benchmark/bench_transport.py [--calls N]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from six.moves import xmlrpc_client
+from six.moves.xmlrpc_server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(THIS_DIR, "..", "src"))
+
+from LDTPLibrary.utils.client import LdtpClient
+
+
+class _KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _OneShotTransport(xmlrpc_client.Transport):
+    """Opens a new connection for every request, like the stock ldtp client."""
+
+    def request(self, host, handler, request_body, verbose=0):
+        try:
+            return xmlrpc_client.Transport.request(self, host, handler, request_body, verbose)
+        finally:
+            self.close()
+
+
+def start_server():
+    server = SimpleXMLRPCServer(('127.0.0.1', 0), _KeepAliveHandler,
+                                logRequests=False, allow_none=True)
+    server.register_function(lambda window_name, object_name: 1, 'click')
+    server.register_function(lambda window_name, object_name: 'text', 'gettextvalue')
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def measure(call, calls):
+    start = time.time()
+    for _ in range(calls):
+        call('frmCalculator', 'btn1')
+    return (time.time() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the LDTP client transport")
+    parser.add_argument('--calls', type=int, default=2000, help='calls per measurement')
+    args = parser.parse_args()
+
+    server = start_server()
+    port = server.server_address[1]
+    uri = 'http://127.0.0.1:%d/RPC2' % port
+    stock = xmlrpc_client.ServerProxy(uri, _OneShotTransport(), allow_none=True)
+    pooled = LdtpClient('127.0.0.1', port)
+    results = {
+        'calls': args.calls,
+        'connection_per_call_us': measure(stock.click, args.calls),
+        'pooled_us': measure(pooled.click, args.calls),
+    }
+    pooled.close()
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
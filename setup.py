@@ -25,8 +25,10 @@ except ImportError:
 
 try:
     from setuptools import setup
+    from setuptools.command.build_py import build_py
 except ImportError:
     from distutils.core import setup
+    from distutils.command.build_py import build_py
 
 
 import sys
@@ -42,6 +44,18 @@ with open(fileToExec) as f: # python3
     code = compile(f.read(), fileToExec, 'exec')
     exec(code)
 
+# asyncio modules, they do not compile before Python 3.5.
+PY35_MODULES = [('LDTPLibrary', 'aio'), ('LDTPLibrary.utils', 'aioclient')]
+
+
+class BuildPy(build_py):
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 5):
+            modules = [module for module in modules if module[:2] not in PY35_MODULES]
+        return modules
+
+
 DESCRIPTION = """
 LDTPLibrary is a linux desktop testing library for Robot Framework
 that leverages the LDTP(Linux Desktop Test Project) libraries.
@@ -65,7 +79,6 @@ setup(name='robotframework-ldtplibrary',
                         "Topic :: Software Development :: Testing"
                      ],
       install_requires=[
-          'decorator >= 3.3.2',
           'robotframework >= 2.9.0',
           'docutils >= 0.8.1',
           # 'ldtp >= 3.5.0', need ldtp, but pip sources does not existed.
@@ -73,6 +86,7 @@ setup(name='robotframework-ldtplibrary',
       py_modules=['ez_setup'],
       package_dir={'': 'src'},
       packages=['LDTPLibrary', 'LDTPLibrary.keywords',
-                'LDTPLibrary.utils'],
+                'LDTPLibrary.utils', 'LDTPLibrary.utils.events'],
       include_package_data=True,
+      cmdclass={'build_py': BuildPy},
       )
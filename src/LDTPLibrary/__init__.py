@@ -17,16 +17,49 @@ See 'LICENSE' in the source distribution for more information.
 
 from .version import VERSION
 from .keywords import *
-from .utils import LibraryListener
+from .utils import LibraryListener, CachedClient, LRUCache, is_truthy
+from .utils.cache import PropertyClient
+from .utils.locator import Locator, LocatorClient
+from .utils.table import IndexedClient
+from .utils.windows import TrackedClient, WindowRegistry
 
 __version__ = VERSION
 
+# Import arguments taken by name only, so the arguments of the run on
+# failure keyword can still follow screenshot_root_directory.
+_IMPORT_OPTIONS = (
+    ('pool_size', 4),
+    ('idle_timeout', 30),
+    ('ldtp_timeout', 120),
+    ('object_cache_ttl', 0),
+    ('object_cache_size', 32),
+    ('screenshot_workers', 0),
+    ('keyword_timing', False),
+    ('timing_report', None),
+    ('log_level', 'INFO'),
+    ('log_buffering', False),
+    ('ldtp_address', None),
+    ('ldtp_port', None),
+    ('display', None),
+    ('record_file', None),
+    ('replay_file', None),
+    ('fanout_workers', 8),
+    ('fanout_timeout', 30),
+    ('window_list_max_age', 0),
+    ('resolve_locators', False),
+    ('property_cache_ttl', 0),
+    ('property_cache_size', 256),
+)
+
 
 class LDTPLibrary(LoggingKeywords,
                   RunOnFailureKeywords,
                   LDTPKeywords,
                   ScreenshotKeywords,
-                  TableKeywords):
+                  TableKeywords,
+                  TimingKeywords,
+                  SessionKeywords,
+                  RecordingKeywords):
     """
     LDTPLibrary is a gui application testing library for Robot Framework.
 
@@ -56,7 +89,8 @@ class LDTPLibrary(LoggingKeywords,
     def __init__(self,
                  run_on_failure='Nothing',
                  screenshot_root_directory=None,
-                 *args):
+                 *args,
+                 **options):
         """
         LDTPLibrary can be imported with optional arguments.
 
@@ -65,16 +99,150 @@ class LDTPLibrary(LoggingKeywords,
         "Nothing" will disable this feature altogether. See `Register Keywords To Run On Failure` keyword
         for more information about this functionality.
 
+        The arguments after ``screenshot_root_directory`` are passed to the run on failure
+        keyword, the following ones are only taken by name.
+
+        :param [pool_size]: number of persistent HTTP connections to ldtpd kept open and
+        reused between keywords. By default 4 will be used. 0 disables the library's own
+        connection pool and falls back to the module level `ldtp` client. The pooled client
+        does not start ldtpd like the `ldtp` module does, so when nothing listens on the
+        default endpoint at import time the library uses the `ldtp` module as well.
+
+        :param [idle_timeout]: seconds an unused pooled connection is kept open before it
+        is closed. By default 30 will be used.
+
+        :param [ldtp_timeout]: seconds the pooled client waits for ldtpd to accept a connection
+        or answer a call before the keyword fails. By default 120 will be used, calls ldtpd
+        itself keeps waiting in, e.g. `Wait` or `Has State` with a timeout, need a higher value.
+        0 waits forever.
+
+        :param [object_cache_ttl]: seconds the object list and existence checks of a window
+        are answered from a local cache. By default 0 will be used, which disables the cache.
+        Any keyword that can change the UI drops the cache, see `Invalidate Object Cache`.
+
+        :param [object_cache_size]: maximum number of windows kept in the object cache.
+        By default 32 will be used.
+
+        :param [screenshot_workers]: number of background threads decoding and writing the
+        screenshots of `Capture Windows Screenshot`, so the keyword returns right after the
+        capture. By default 0 will be used, which writes them before the keyword returns.
+
+        :param [keyword_timing]: records the latency of every keyword call when True, and
+        additionally per window and object name when `arguments`. See `Get Keyword Timing
+        Statistics`. By default False will be used.
+
+        :param [timing_report]: JSON file, or CSV file if the name ends with .csv, the keyword
+        timing statistics are written to at the end of every suite. Setting it enables timing.
+
+        :param [log_level]: level of the messages this library logs, one of TRACE, DEBUG, INFO,
+        WARN or NONE. Messages below it are not even formatted. By default INFO will be used.
+        See `Set LDTP Log Level`.
+
+        :param [log_buffering]: when True, the messages of a keyword are collected and written
+        as one message per level when the keyword ends. By default False will be used.
+
+        :param [ldtp_address]: host of the ldtpd the library talks to. By default the
+        LDTP_SERVER_ADDR environment variable or localhost will be used.
+
+        :param [ldtp_port]: port of the ldtpd the library talks to. By default the
+        LDTP_SERVER_PORT environment variable or 4118 will be used. Setting the address or
+        port uses the library's own client even when pool_size is 0.
+
+        :param [display]: X display driven by that ldtpd, exported as DISPLAY for the
+        applications started by the test run. See `Connect To LDTP Server` and
+        `Start LDTP Session` for running pabot workers on separate desktops.
+
+        :param [record_file]: file every ldtpd call, its response and latency are appended to,
+        see `Start LDTP Recording`. By default nothing is recorded.
+
+        :param [replay_file]: recording the library answers its calls from instead of ldtpd,
+        see `Replay LDTP Recording`. No desktop is needed.
+
+        :param [fanout_workers]: number of threads `Objects Exist`, `Get Text Values` and
+        `Get States Of Objects` read objects with concurrently. By default 8 will be used,
+        1 reads them one by one.
+
+        :param [fanout_timeout]: seconds all the reads of one of those keywords may take together.
+        By default 30 will be used.
+
+        :param [window_list_max_age]: seconds the list of windows is kept, answering `Get Window
+        List` and `Gui Exist` of a window without enumerating the desktop. Keywords that may open
+        or close windows drop it. By default 0 will be used, which disables the list.
+
+        :param [resolve_locators]: when True, window and object names given as Unix globs, e.g.
+        `frm*` or `btn?`, are matched by the library against the window and object lists and sent
+        to ldtpd as the concrete names found, remembered until a window is launched or closed or a
+        call with them fails. By default False will be used.
+
+        :param [property_cache_ttl]: seconds the results of `Get Object Property`, `Get All States`
+        and `Has State` are kept per window, object and property. Any keyword that can change a
+        window drops the entries of that window. By default 0 will be used, which disables the
+        cache. See `Get Cache Statistics`.
+
+        :param [property_cache_size]: maximum number of properties and states kept.
+        By default 256 will be used.
+
         Examples:
         | Library `|` LDTPLibrary  `|` run_on_failure = Log Source | # run `Log Source` on failure |
         | Library `|` LDTPLibrary  `|` run_on_failure = Capture Screenshot | # run `Capture Screenshot` on failure |
         | Library `|` LDTPLibrary  `|` run_on_failure = Capture Screenshot `|` out_file=/tmp/shot.png | # run `Capture Screenshot` on failure |
         | Library `|` LDTPLibrary  `|` run_on_failure = Nothing  | # does nothing on failure |
         | Library `|` LDTPLibrary  `|` run_on_failure = Capture Windows Screenshot `|` screenshot_root_directory=/tmp/ | # run `Capture Windows Screenshot ` on failure |
+        | Library `|` LDTPLibrary  `|` pool_size=8 `|` idle_timeout=60 | # keep up to 8 ldtpd connections open for 60 seconds |
+        | Library `|` LDTPLibrary  `|` object_cache_ttl=5 | # answer repeated object lookups locally for 5 seconds |
+        | Library `|` LDTPLibrary  `|` run_on_failure = Capture Windows Screenshot `|` screenshot_workers=2 | # write failure screenshots in the background |
+        | Library `|` LDTPLibrary  `|` timing_report=${OUTPUTDIR}/timing.csv | # write keyword latency statistics after each suite |
+        | Library `|` LDTPLibrary  `|` log_level=WARN | # log only warnings, e.g. in long running suites |
+        | Library `|` LDTPLibrary  `|` ldtp_port=4120 `|` display=:101 | # drive the desktop of the ldtpd on port 4120 |
+        | Library `|` LDTPLibrary  `|` replay_file=${CURDIR}/calculator.ldtprec | # rerun against a recording, without a desktop |
 
         """
+        option = dict(_IMPORT_OPTIONS)
+        for name in list(options):
+            if name in option:
+                option[name] = options.pop(name)
+        # Other named arguments belong to the run on failure keyword,
+        # e.g. out_file=/tmp/shot.png.
+        args += tuple('%s=%s' % item for item in options.items())
         for base in LDTPLibrary.__bases__:
             base.__init__(self)
+        self._set_log_level(option['log_level'], option['log_buffering'])
         self.screenshot_root_directory = screenshot_root_directory
+        self._screenshot_workers = int(option['screenshot_workers'])
+        self._enable_keyword_timing(option['keyword_timing'], option['timing_report'])
+        self._pool_size = int(option['pool_size'])
+        self._idle_timeout = option['idle_timeout']
+        self._ldtp_timeout = float(option['ldtp_timeout'])
+        self._fanout_workers = int(option['fanout_workers'])
+        self._fanout_timeout = float(option['fanout_timeout'])
+        if float(option['object_cache_ttl']) > 0:
+            self._object_cache = LRUCache(option['object_cache_ttl'], option['object_cache_size'])
+        if float(option['window_list_max_age']) > 0:
+            self._window_registry = WindowRegistry(option['window_list_max_age'])
+        if is_truthy(option['resolve_locators']):
+            self._locator = Locator()
+        if float(option['property_cache_ttl']) > 0:
+            self._property_cache = LRUCache(option['property_cache_ttl'], option['property_cache_size'])
+        address, port, display = option['ldtp_address'], option['ldtp_port'], option['display']
+        if address or port or (self._pool_size > 0 and self._default_server_is_listening()):
+            self._connect(address, port, display)
+        else:
+            if self._window_registry is not None:
+                self._client = TrackedClient(self._client, self._window_registry)
+            if self._object_cache is not None:
+                self._client = CachedClient(self._client, self._object_cache)
+            if self._property_cache is not None:
+                self._client = PropertyClient(self._client, self._property_cache)
+            if self._locator is not None:
+                self._client = LocatorClient(self._client, self._locator)
+            self._client = IndexedClient(self._client, self._table_indexes)
+            if display:
+                self._set_display(display)
+        if option['replay_file']:
+            self.replay_ldtp_recording(option['replay_file'])
+        elif option['record_file']:
+            self.start_ldtp_recording(option['record_file'])
         self.register_keyword_to_run_on_failure(run_on_failure, *args)
-        self.ROBOT_LIBRARY_LISTENER = LibraryListener()
+        self.ROBOT_LIBRARY_LISTENER = LibraryListener(suite_end=(self._close_fanout_pool,
+                                                                 self._close_screenshot_pool,
+                                                                 self._write_timing_report))
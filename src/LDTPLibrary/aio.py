@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Robot Framework LDTP Library
+
+LDTPLibrary is a gui application testing library for Robot Framework.
+
+It uses the LDTP (Linux Desktop Test Project) libraries internally to control a gui application.
+See http://ldtp.freedesktop.org/wiki/ for more information on LDTP.
+
+@author: Wang Yang <wywincl@gmail.com>
+@copyright: Copyright (c) 2015-2016 Wang Yang
+@license: GPLv3
+
+See 'LICENSE' in the source distribution for more information.
+"""
+
+import time
+import asyncio
+from .utils.aioclient import AsyncLdtpClient
+from .utils.waiter import GuiWaiter
+
+__all__ = ['AsyncLDTPKeywords',
+           'AsyncLdtpClient']
+
+
+def _remote(name, doc):
+    async def keyword(self, *args):
+        return await self.client.call(name, *args)
+    keyword.__doc__ = doc
+    return keyword
+
+
+class AsyncLDTPKeywords(object):
+    """Coroutine versions of the common `LDTPKeywords`, for Python code
+    driving ldtpd outside Robot Framework. Requires Python 3.5 or newer.
+
+    Keywords take the same arguments as in the library and raise
+    LdtpExecutionError with the ldtpd message on failure. One instance
+    talks to one ldtpd, so a single event loop can drive several sessions
+    or overlap independent reads:
+
+    | ldtp1 = AsyncLDTPKeywords(port=4119)
+    | ldtp2 = AsyncLDTPKeywords(port=4120)
+    | await asyncio.gather(ldtp1.click('frmCalculator', 'btn1'),
+    |                      ldtp2.click('frmCalculator', 'btn2'))
+    """
+
+    def __init__(self, address=None, port=None, pool_size=4, idle_timeout=30, client=None):
+        self.client = client or AsyncLdtpClient(address, port, pool_size, idle_timeout)
+        self._waiter = GuiWaiter()
+
+    async def launch_app(self, cmd, lang='zh_CN.UTF-8', delay=0, env=1, *args):
+        """Launches ``cmd`` and returns its PID."""
+        return await self.client.launchapp(cmd, list(args), int(delay), int(env), lang)
+
+    async def wait_till_gui_exist(self, window_name, object_name='', gui_time_out=30, state=''):
+        """Returns 1 once the window, or object, exists, 0 after
+        ``gui_time_out`` seconds. Polls without blocking the event loop."""
+        async def condition_met():
+            return await self.client.guiexist(window_name, object_name) and \
+                (not object_name or not state or await self.client.hasstate(window_name, object_name, state))
+        return int(await self._wait_until(condition_met, gui_time_out))
+
+    async def wait_till_gui_not_exist(self, window_name, object_name='', gui_time_out=30):
+        """Returns 1 once the window, or object, is gone, 0 after
+        ``gui_time_out`` seconds."""
+        async def gone():
+            return not await self.client.guiexist(window_name, object_name)
+        return int(await self._wait_until(gone, gui_time_out))
+
+    async def run_ldtp_batch(self, operations):
+        """Runs ``operations``, ``(method_name, args)`` pairs, concurrently
+        and returns ``(result, error)`` pairs in order."""
+        return await self.client.batch([(name, list(args)) for name, args in operations])
+
+    async def capture_screenshot(self, window_name=None, out_file=None):
+        """Captures ``window_name``, or the whole screen, to ``out_file``
+        and returns its path."""
+        return await self.client.imagecapture(window_name, out_file)
+
+    click = _remote('click', "Clicks ``object_name`` of ``window_name``.")
+    double_click = _remote('doubleclick', "Double clicks ``object_name``.")
+    set_text_value = _remote('settextvalue', "Replaces the text of ``object_name`` with ``data``.")
+    get_text_value = _remote('gettextvalue', "Returns the text of ``object_name``.")
+    enter_string = _remote('enterstring', "Types ``data`` into ``object_name``.")
+    gui_exist = _remote('guiexist', "Returns 1 if the window, or object, exists, else 0.")
+    object_exist = _remote('objectexist', "Returns 1 if ``object_name`` exists, else 0.")
+    get_object_list = _remote('getobjectlist', "Returns the object names of ``window_name``.")
+    get_window_list = _remote('getwindowlist', "Returns the names of all windows.")
+    get_object_property = _remote('getobjectproperty', "Returns ``property_name`` of ``object_name``.")
+    get_all_states = _remote('getallstates', "Returns the states of ``object_name``.")
+    has_state = _remote('hasstate', "Returns 1 if ``object_name`` has ``state``, else 0.")
+    get_object_size = _remote('getobjectsize', "Returns ``[x, y, width, height]`` of ``object_name``.")
+    get_window_size = _remote('getwindowsize', "Returns ``[x, y, width, height]`` of ``window_name``.")
+    activate_window = _remote('activatewindow', "Brings ``window_name`` to the front.")
+    close_window = _remote('closewindow', "Closes ``window_name``.")
+    select_menu_item = _remote('selectmenuitem', "Selects the menu item ``object_name``, e.g. ``mnuFile;mnuQuit``.")
+    combo_select = _remote('comboselect', "Selects ``item_name`` in a combo box.")
+    select_tab = _remote('selecttab', "Selects ``tab_name`` of a page tab list.")
+    check = _remote('check', "Checks a check box.")
+    uncheck = _remote('uncheck', "Unchecks a check box.")
+    verify_check = _remote('verifycheck', "Returns 1 if a check box is checked, else 0.")
+    get_row_count = _remote('getrowcount', "Returns the row count of a table.")
+    get_cell_value = _remote('getcellvalue', "Returns the text of a table cell.")
+    set_cell_value = _remote('setcellvalue', "Sets the text of a table cell.")
+    select_row = _remote('selectrow', "Selects the table row containing ``row_text``.")
+    generate_key_event = _remote('generatekeyevent', "Types ``data``, e.g. ``<ctrl>a``.")
+
+    def close(self):
+        """Closes the idle connections to ldtpd."""
+        self.client.close()
+
+    # Private
+
+    async def _wait_until(self, predicate, timeout):
+        # Same backoff as the blocking keywords, see GuiWaiter.
+        deadline = time.time() + float(timeout)
+        interval = self._waiter.initial_interval
+        while True:
+            if await predicate():
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * self._waiter.factor, self._waiter.max_interval)
@@ -20,9 +20,15 @@ from .logging import LoggingKeywords
 from .runonfailure import RunOnFailureKeywords
 from ._table import TableKeywords
 from ._screenshot import ScreenshotKeywords
+from ._timing import TimingKeywords
+from ._session import SessionKeywords
+from ._recording import RecordingKeywords
 
 __all__ = ['LDTPKeywords',
            'LoggingKeywords',
            'RunOnFailureKeywords',
            'TableKeywords',
-           'ScreenshotKeywords']
+           'ScreenshotKeywords',
+           'TimingKeywords',
+           'SessionKeywords',
+           'RecordingKeywords']
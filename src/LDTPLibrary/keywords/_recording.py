@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Robot Framework LDTP Library
+
+LDTPLibrary is a gui application testing library for Robot Framework.
+
+It uses the LDTP (Linux Desktop Test Project) libraries internally to control a gui application.
+See http://ldtp.freedesktop.org/wiki/ for more information on LDTP.
+
+@author: Wang Yang <wywincl@gmail.com>
+@copyright: Copyright (c) 2015-2016 Wang Yang
+@license: GPLv3
+
+See 'LICENSE' in the source distribution for more information.
+"""
+
+import os
+from ..utils.recording import CallRecorder, RecordingClient, ReplayClient
+from ..utils.table import IndexedClient
+from .keywordgroup import KeywordGroup
+
+
+class RecordingKeywords(KeywordGroup):
+    def __init__(self):
+        self._recorder = None
+
+    # Public
+
+    def start_ldtp_recording(self, path):
+        """Writes every call this library makes to ldtpd, with its response
+        and latency, to the file ``path`` and returns its absolute path.
+
+        Calls are appended one JSON array per line, so a recording can be
+        continued by a later run. The recording runs until `Stop LDTP
+        Recording`, across `Connect To LDTP Server` and pooled sessions,
+        and can be played back without a desktop with `Replay LDTP
+        Recording` or the ``replay_file`` import argument.
+
+        Example:
+        | Start LDTP Recording | ${OUTPUTDIR}/calculator.ldtprec |
+        """
+        self.stop_ldtp_recording()
+        path = os.path.abspath(path)
+        self._recorder = CallRecorder(path)
+        self._client = self._record_client(self._client)
+        self._info("start ldtp recording (%s)", path)
+        return path
+
+    def stop_ldtp_recording(self):
+        """Stops the recording started with `Start LDTP Recording` and
+        returns the number of calls recorded."""
+        if self._recorder is None:
+            return 0
+        recorder, self._recorder = self._recorder, None
+        recorder.close()
+        self._client = self._record_client(self._client)
+        self._info("stop ldtp recording (%s, %d calls)", recorder.path, recorder.calls)
+        return recorder.calls
+
+    def replay_ldtp_recording(self, path, simulate_latency=False):
+        """Answers the calls of this library from the recording ``path``
+        written by `Start LDTP Recording` instead of from ldtpd, and returns
+        the number of recorded calls.
+
+        Nothing is sent to ldtpd and no desktop is needed, so a suite reruns
+        in seconds and profiles only the overhead of the library. A call
+        with arguments that were never recorded fails. With
+        ``simulate_latency`` every call takes as long as it did when it was
+        recorded. `Connect To LDTP Server` ends the replay.
+
+        Example:
+        | Replay LDTP Recording | ${CURDIR}/calculator.ldtprec |
+        """
+        self.stop_ldtp_recording()
+        client = ReplayClient(path, bool(simulate_latency))
+        self._info("replay ldtp recording (%s, %d calls)", path, len(client))
+        self._swap_client(IndexedClient(client, self._table_indexes))
+        self._ldtp_uri = client.uri
+        return len(client)
+
+    # Private
+
+    def _record_client(self, client):
+        if isinstance(client, RecordingClient):
+            client = client.client
+        if self._recorder is None:
+            return client
+        return RecordingClient(client, self._recorder)
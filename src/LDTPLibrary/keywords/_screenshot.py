@@ -19,6 +19,7 @@ import os
 import errno
 import robot
 from LDTPLibrary import utils
+from ..utils.client import write_image
 from .keywordgroup import KeywordGroup
 
 
@@ -27,6 +28,9 @@ class ScreenshotKeywords(KeywordGroup):
         self._screenshot_index = {}
         self._screenshot_path_stack = []
         self.screenshot_root_directory = None
+        self._screenshot_workers = 0
+        self._screenshot_pool = None
+        self._pending_screenshots = []
 
     # Public
 
@@ -100,21 +104,57 @@ class ScreenshotKeywords(KeywordGroup):
         Example 3:
         | Capture Windows Screenshot | ${OTHER_DIR}${/}sc-{index:06}.png |
         | File Should Exist | ${OTHER_DIR}${/}sc-000001.png |
+
+        When the library is imported with ``screenshot_workers`` greater than 0,
+        the screenshot is still captured before this keyword returns, but it is
+        decoded and written to disk in the background. Use `Flush Screenshots`
+        before checking the file, all pending screenshots are also written at
+        the end of every suite, which also stops the background workers.
         """
         path, link = self._get_screenshot_paths(filename)
         self._create_directory(path)
-        if hasattr(self._client, 'imagecapture'):
-            if not self._client.imagecapture(window_name=window_name, out_file=path):
-                raise RuntimeError('Failed to save screenshot ' + link)
-        else:
-            if not self._client.imagecapture(window_name=window_name, out_file=path):
+        if self._screenshot_workers > 0 and hasattr(self._client, 'imagecapture_data'):
+            data = self._client.imagecapture_data(window_name)
+            if not data:
                 raise RuntimeError('Failed to save screenshot ' + link)
+            if self._screenshot_pool is None:
+                from multiprocessing.pool import ThreadPool
+                self._screenshot_pool = ThreadPool(self._screenshot_workers)
+            self._pending_screenshots.append(
+                    (link, self._screenshot_pool.apply_async(write_image, (path, data))))
+        elif not self._client.imagecapture(window_name=window_name, out_file=path):
+            raise RuntimeError('Failed to save screenshot ' + link)
         # Image is shown on its own row and thus prev row is closed on purpose
         self._html('</td></tr><tr><td colspan="3"><a href="%s">'
-                   '<img src="%s" width="800px"></a>' % (link, link))
+                   '<img src="%s" width="800px"></a>', link, link)
         return path
 
+    def flush_screenshots(self):
+        """Waits until screenshots taken by `Capture Windows Screenshot` in
+        the background have been written to disk.
+
+        Failures to write a screenshot are logged as warnings. Does nothing
+        unless the library was imported with ``screenshot_workers``.
+        """
+        self._flush_screenshots()
+
     # Private
+    def _flush_screenshots(self):
+        pending, self._pending_screenshots = self._pending_screenshots, []
+        for link, result in pending:
+            try:
+                result.get()
+            except (IOError, OSError, TypeError, ValueError) as err:
+                self._warn('Failed to save screenshot %s: %s', link, err)
+
+    def _close_screenshot_pool(self):
+        # The workers are started again by the next background screenshot.
+        self._flush_screenshots()
+        if self._screenshot_pool is not None:
+            pool, self._screenshot_pool = self._screenshot_pool, None
+            pool.close()
+            pool.join()
+
     def _create_directory(self, path):
         target_dir = os.path.dirname(path)
         if not os.path.exists(target_dir):
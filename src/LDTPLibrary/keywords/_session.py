@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Robot Framework LDTP Library
+
+LDTPLibrary is a gui application testing library for Robot Framework.
+
+It uses the LDTP (Linux Desktop Test Project) libraries internally to control a gui application.
+See http://ldtp.freedesktop.org/wiki/ for more information on LDTP.
+
+@author: Wang Yang <wywincl@gmail.com>
+@copyright: Copyright (c) 2015-2016 Wang Yang
+@license: GPLv3
+
+See 'LICENSE' in the source distribution for more information.
+"""
+
+import os
+import shlex
+from LDTPLibrary import utils
+from ..utils.cache import CachedClient, PropertyClient
+from ..utils.client import LdtpClient
+from ..utils.recording import RecordingClient, ReplayClient
+from ..utils.locator import LocatorClient
+from ..utils.windows import TrackedClient
+from ..utils.table import IndexedClient
+from ..utils.session import LDTPSession, LDTPSessionPool, normalize_display, server_is_listening
+from .keywordgroup import KeywordGroup
+
+# Clients created by the library, which it closes when replacing them.
+_OWN_CLIENTS = (LdtpClient, CachedClient, RecordingClient, ReplayClient, TrackedClient,
+                LocatorClient, PropertyClient, IndexedClient)
+
+
+class SessionKeywords(KeywordGroup):
+    def __init__(self):
+        self._pool_size = 4
+        self._idle_timeout = 30
+        self._ldtp_timeout = 120
+        self._ldtp_uri = None
+        self._display = None
+        self._session = None
+        self._session_pool = None
+        self._pooled_session = None
+
+    # Public
+
+    def connect_to_ldtp_server(self, address='localhost', port=4118, display=None):
+        """Sends the keywords of this library to the ldtpd listening on
+        ``address`` and ``port`` and returns the previous ldtpd URI.
+
+        ``display`` is the X display that ldtpd drives, e.g. ``:101``. It is
+        exported as ``DISPLAY`` so applications started from the test run,
+        for example with the Process library, open on the same desktop.
+
+        Together with the ``ldtp_address``, ``ldtp_port`` and ``display``
+        import arguments this lets every pabot worker drive its own desktop,
+        see also `Start LDTP Session`.
+
+        Example:
+        | Connect To LDTP Server | localhost | 4120 | :101 |
+        """
+        old_uri = self._ldtp_uri
+        self._connect(address, port, display)
+        self._info("connect to ldtp server (%s, %s)", self._ldtp_uri, self._display)
+        return old_uri
+
+    def start_ldtp_session(self, display=None, port=None, ldtpd_command=None, reuse=True):
+        """Starts a headless Xvfb display with its own ldtpd and connects
+        this library to it. Returns the display, e.g. ``:101``.
+
+        ``display`` and ``port`` default to a pair chosen by the pabot
+        execution pool id of the process, display ``:100`` and port 4119
+        for the first worker, ``:101`` and 4120 for the second and so on,
+        so parallel workers never share a desktop. Outside pabot the first
+        pair is used.
+
+        ``ldtpd_command`` overrides the command starting ldtpd, ``%(port)d``
+        in it is replaced with the port. When ``reuse`` is true and an ldtpd
+        already listens on the port, e.g. one started for an earlier suite
+        of the same worker, the library only connects to it.
+
+        The session is stopped by `Stop LDTP Session` or when the process
+        exits. Requires Xvfb and the ldtpd package.
+
+        Example:
+        | Start LDTP Session |
+        | Launch App | gnome-calculator |
+        """
+        session = LDTPSession(display, port, ldtpd_command=shlex.split(ldtpd_command) if ldtpd_command else None)
+        self.stop_ldtp_session()
+        if not (reuse and server_is_listening(session.address, session.port)):
+            self._info("start ldtp session (%s, %d)", session.display, session.port)
+            self._session = session.start()
+        self._connect(session.address, session.port, session.display)
+        return session.display
+
+    def stop_ldtp_session(self):
+        """Stops the Xvfb display and ldtpd started by `Start LDTP Session`.
+
+        Sessions the library only connected to are left running.
+        """
+        if self._session is not None:
+            self._info("stop ldtp session (%s, %d)", self._session.display, self._session.port)
+            session, self._session = self._session, None
+            session.stop()
+
+    def start_ldtp_session_pool(self, size=2, display=None, port=None, ldtpd_command=None):
+        """Starts ``size`` headless Xvfb displays, each with its own ldtpd,
+        and returns their displays.
+
+        Tests then take a desktop with `Checkout LDTP Session`. Displays and
+        ports are numbered from ``display`` and ``port``, by default ``:100``
+        and 4119, and offset per pabot worker so parallel workers never
+        share a desktop. ``ldtpd_command`` is as in `Start LDTP Session`.
+
+        The pool is stopped when the suite, or test, that started it ends.
+
+        Example:
+        | Suite Setup | Start LDTP Session Pool | 4 |
+        """
+        self._stop_session_pool()
+        pool = LDTPSessionPool(size, display, port,
+                               ldtpd_command=shlex.split(ldtpd_command) if ldtpd_command else None)
+        self._info("start ldtp session pool of %s sessions", size)
+        self._session_pool = pool.start()
+        utils.events.on('scope_end', 'current', self._stop_session_pool)
+        return [session.display for session in pool.sessions]
+
+    def checkout_ldtp_session(self, timeout=60):
+        """Takes a free desktop from the pool started with `Start LDTP
+        Session Pool` and sends the keywords of this library to its ldtpd.
+        Returns its display.
+
+        Waits up to ``timeout`` seconds when all desktops are in use. A
+        desktop whose Xvfb or ldtpd died is restarted before it is handed
+        out. The desktop goes back to the pool with `Release LDTP Session`
+        or when the current test, or suite, ends.
+
+        Example:
+        | Checkout LDTP Session |
+        | Launch App | gnome-calculator |
+        """
+        if self._session_pool is None:
+            raise RuntimeError('No LDTP session pool, use Start LDTP Session Pool first.')
+        self.release_ldtp_session()
+        session = self._session_pool.checkout(timeout)
+        self._info("checkout ldtp session (%s, %d)", session.display, session.port)
+        self._pooled_session = (session, self._client, self._display, self._ldtp_uri)
+        self._client = self._client_for(session.address, session.port)
+        self._invalidate_client_caches()
+        self._set_display(session.display)
+        utils.events.on('scope_end', 'current', self.release_ldtp_session)
+        return session.display
+
+    def release_ldtp_session(self):
+        """Gives the desktop taken with `Checkout LDTP Session` back to the
+        pool and restores the previous ldtpd connection."""
+        if self._pooled_session is None:
+            return
+        session, previous_client, previous_display, previous_uri = self._pooled_session
+        self._pooled_session = None
+        self._info("release ldtp session (%s, %d)", session.display, session.port)
+        self._client.close()
+        self._client = self._record_client(previous_client)
+        self._ldtp_uri = previous_uri
+        self._invalidate_client_caches()
+        if previous_display:
+            self._set_display(previous_display)
+        if self._session_pool is not None:
+            self._session_pool.checkin(session)
+
+    # Private
+
+    def _client_for(self, address=None, port=None):
+        client = LdtpClient(address, port, pool_size=self._pool_size, idle_timeout=self._idle_timeout,
+                            timeout=self._ldtp_timeout)
+        self._ldtp_uri = client.uri
+        if self._window_registry is not None:
+            client = TrackedClient(client, self._window_registry)
+        if self._object_cache is not None:
+            client = CachedClient(client, self._object_cache)
+        if self._property_cache is not None:
+            client = PropertyClient(client, self._property_cache)
+        if self._locator is not None:
+            client = LocatorClient(client, self._locator)
+        return self._record_client(IndexedClient(client, self._table_indexes))
+
+    def _connect(self, address=None, port=None, display=None):
+        self._swap_client(self._client_for(address, port))
+        if display:
+            self._set_display(display)
+
+    @staticmethod
+    def _default_server_is_listening():
+        return server_is_listening(os.environ.get('LDTP_SERVER_ADDR', 'localhost'),
+                                   os.environ.get('LDTP_SERVER_PORT', '4118'))
+
+    def _swap_client(self, client):
+        old_client, self._client = self._client, client
+        self._invalidate_client_caches()
+        if isinstance(old_client, _OWN_CLIENTS):
+            old_client.close()
+
+    def _invalidate_client_caches(self):
+        # Everything the library remembers about the desktop of the client
+        # it just stopped using.
+        self._table_indexes.clear()
+        if self._window_registry is not None:
+            self._window_registry.invalidate()
+        if self._object_cache is not None:
+            self._object_cache.invalidate()
+        if self._property_cache is not None:
+            self._property_cache.invalidate()
+        if self._locator is not None:
+            self._locator.invalidate()
+
+    def _set_display(self, display):
+        self._display = normalize_display(display)
+        os.environ['DISPLAY'] = self._display
+
+    def _stop_session_pool(self):
+        if self._session_pool is None:
+            return
+        self.release_ldtp_session()
+        pool, self._session_pool = self._session_pool, None
+        self._info("stop ldtp session pool")
+        pool.stop()
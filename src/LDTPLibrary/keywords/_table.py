@@ -15,26 +15,18 @@ See http://ldtp.freedesktop.org/wiki/ for more information on LDTP.
 See 'LICENSE' in the source distribution for more information.
 """
 
-import sys
-try:
-    import ldtp
-except ImportError:
-    if sys.platform != "darwin":
-        raise
-    import atomac.ldtp as ldtp
+import csv
+import six
 from .keywordgroup import KeywordGroup
 from ._exception import LdtpError
-try:
-    from ldtp.client_exception import LdtpExecutionError
-except ImportError:
-    if sys.platform != "darwin":
-        raise
-    from atomac.ldtp.client_exception import LdtpExecutionError
+from ..utils.lazy import ldtp, LdtpExecutionError
+from ..utils.table import RowIndex, iter_table_chunks, probe_columns
 
 
 class TableKeywords(KeywordGroup):
     def __init__(self):
         self._client = ldtp
+        self._table_indexes = {}
 
     def double_click_row_index(self, window_name, object_name, row_index, col_index=0):
         """
@@ -54,8 +46,8 @@ class TableKeywords(KeywordGroup):
         @return: row index matching the text on success.
         @rtype: integer
         """
-        self._info("double click row index, col index (%d,%d) of [%s, %s]" % (row_index, col_index,
-                                                                              window_name, object_name))
+        self._info("double click row index, col index (%d,%d) of [%s, %s]", row_index, col_index,
+                   window_name, object_name)
         try:
             self._client.doubleclickrowindex(window_name, object_name, row_index, col_index)
         except LdtpError as e:
@@ -78,8 +70,12 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("select row partial match (%s, %s, %s) " % (window_name, object_name, row_text))
-            return ldtp.selectrowpartialmatch(window_name, object_name, row_text)
+            self._info("select row partial match (%s, %s, %s) ", window_name, object_name, row_text)
+            index = self._table_indexes.get((window_name, object_name))
+            if index is not None:
+                return self._client.selectrowindex(window_name, object_name,
+                                                   self._find_indexed_row(index, row_text, True))
+            return self._client.selectrowpartialmatch(window_name, object_name, row_text)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -102,8 +98,8 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("multi select  (%s, %s, %s) " % (window_name, object_name, row_text_list))
-            return ldtp.multiselect(window_name, object_name, row_text_list)
+            self._info("multi select  (%s, %s, %s) ", window_name, object_name, row_text_list)
+            return self._client.multiselect(window_name, object_name, row_text_list)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -128,8 +124,8 @@ class TableKeywords(KeywordGroup):
 
         """
         try:
-            self._info("multi remove  (%s, %s, %s) " % (window_name, object_name, row_text_list))
-            return ldtp.multiremove(window_name, object_name, row_text_list)
+            self._info("multi remove  (%s, %s, %s) ", window_name, object_name, row_text_list)
+            return self._client.multiremove(window_name, object_name, row_text_list)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -150,8 +146,8 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("select row index (%s, %s, %d)" % (window_name, object_name, row_index))
-            return ldtp.selectrowindex(window_name, object_name, row_index)
+            self._info("select row index (%s, %s, %d)", window_name, object_name, row_index)
+            return self._client.selectrowindex(window_name, object_name, row_index)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -170,8 +166,8 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("select last row of (%s, %s)" % (window_name, object_name))
-            return ldtp.selectlastrow(window_name, object_name)
+            self._info("select last row of (%s, %s)", window_name, object_name)
+            return self._client.selectlastrow(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -198,8 +194,8 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("set cell value (%s, %s, data=%s)" % (window_name, object_name, data))
-            return ldtp.setcellvalue(window_name, object_name, row_index, column, data)
+            self._info("set cell value (%s, %s, data=%s)", window_name, object_name, data)
+            return self._client.setcellvalue(window_name, object_name, row_index, column, data)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -222,11 +218,102 @@ class TableKeywords(KeywordGroup):
         @rtype: string
         """
         try:
-            self._info("get cell value (%s, %s, %d)" % (window_name, object_name, row_index))
-            return ldtp.getcellvalue(window_name, object_name, row_index, column)
+            self._info("get cell value (%s, %s, %d)", window_name, object_name, row_index)
+            return self._client.getcellvalue(window_name, object_name, row_index, column)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
+    def get_table_snapshot(self, window_name, object_name, start_row=0, end_row=None,
+                           columns=None, chunk_size=500, out_file=None):
+        """
+        Get the values of many table cells at once
+
+        The cells are read in batches of chunk_size rows, each batch in a single request
+        to ldtpd when the library uses its own client, instead of one request per cell.
+
+        @param window_name: Window name to type in, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type window_name: string
+        @param object_name: Object name to type in, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type object_name: string
+        @param start_row: First row index to read, default value 0
+        @type start_row: integer
+        @param end_row: Row index to stop before, default the row count of the table
+        @type end_row: integer
+        @param columns: Column indexes to read, default all columns
+        @type columns: list
+        @param chunk_size: Number of rows read per request, default value 500
+        @type chunk_size: integer
+        @param out_file: CSV file to stream the rows into instead of returning them,
+        so memory stays bounded on very large tables
+        @type out_file: string
+
+        @return: dictionary mapping each column index to the list of its values from
+        start_row on, or the path of out_file when given.
+        @rtype: dictionary
+
+        Examples:
+        | ${snapshot}= | Get Table Snapshot | ${FRM_NAME} | ${TBL_NAME} |
+        | Should Be Equal | ${snapshot[1][0]} | first row, second column |
+        | Get Table Snapshot | ${FRM_NAME} | ${TBL_NAME} | out_file=${OUTPUTDIR}${/}table.csv |
+        """
+        if isinstance(columns, six.string_types):
+            columns = columns.split(',')
+        self._info("get table snapshot (%s, %s, rows %s-%s)", window_name, object_name, start_row, end_row)
+        chunks = iter_table_chunks(self._client, window_name, object_name, start_row, end_row,
+                                   columns, chunk_size)
+        if out_file:
+            return self._write_table_csv(out_file, chunks)
+        snapshot = {}
+        for _, chunk in chunks:
+            for column, values in chunk.items():
+                snapshot.setdefault(column, []).extend(values)
+        return snapshot
+
+    def index_table(self, window_name, object_name, columns=None):
+        """
+        Index the row texts of a table for fast row lookups
+
+        Reads the table once with `Get Table Snapshot` and answers later `Get Table Row Index`,
+        `Does Row Exist` and `Select Row Partial Match` calls on the same window and object
+        name from the index instead of letting ldtpd scan the table on every call. Any keyword
+        that can change the window, e.g. `Click`, `Set Cell Value` or `Close Window`, drops its
+        indexes, keywords not acting on one window like `Launch App` or `Generate Key Event`
+        drop all of them, see also `Invalidate Table Cache`.
+
+        @param window_name: Window name to type in, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type window_name: string
+        @param object_name: Object name to type in, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type object_name: string
+        @param columns: Column indexes to index, default all columns
+        @type columns: list
+
+        @return: number of rows indexed.
+        @rtype: integer
+        """
+        if isinstance(columns, six.string_types):
+            columns = columns.split(',')
+        self._info("index table (%s, %s)", window_name, object_name)
+        index = RowIndex(iter_table_chunks(self._client, window_name, object_name, columns=columns))
+        self._table_indexes[(window_name, object_name)] = index
+        return index.row_count
+
+    def invalidate_table_cache(self, window_name=None, object_name=None):
+        """
+        Drop the row index built by `Index Table`
+
+        @param window_name: Window name of the table, None for all windows.
+        @type window_name: string
+        @param object_name: Object name of the table, None for all tables of the window.
+        @type object_name: string
+        """
+        for key in list(self._table_indexes):
+            if window_name in (None, key[0]) and object_name in (None, key[1]):
+                del self._table_indexes[key]
+
     def get_cell_size(self, window_name, object_name, row_index, column=0):
         """
         Get cell size
@@ -246,8 +333,8 @@ class TableKeywords(KeywordGroup):
         @rtype: list
         """
         try:
-            self._info("get cell size (%s, %s, %d)" % (window_name, object_name, row_index))
-            return ldtp.getcellsize(window_name, object_name, row_index, column)
+            self._info("get cell size (%s, %s, %d)", window_name, object_name, row_index)
+            return self._client.getcellsize(window_name, object_name, row_index, column)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -268,8 +355,8 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("right click row object (%s, %s, %s)" % (window_name, object_name, row_text))
-            return ldtp.rightclick(window_name, object_name, row_text)
+            self._info("right click row object (%s, %s, %s)", window_name, object_name, row_text)
+            return self._client.rightclick(window_name, object_name, row_text)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -292,8 +379,8 @@ class TableKeywords(KeywordGroup):
         @rtype: string
         """
         try:
-            self._info("check row at (%s, %s, %d)" % (window_name, object_name, row_index))
-            return ldtp.checkrow(window_name, object_name, row_index, column)
+            self._info("check row at (%s, %s, %d)", window_name, object_name, row_index)
+            return self._client.checkrow(window_name, object_name, row_index, column)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -316,8 +403,8 @@ class TableKeywords(KeywordGroup):
         @rtype: string
         """
         try:
-            self._info("expend table cell at (%s, %s, %d)" % (window_name, object_name, row_index))
-            return ldtp.expendtablecell(window_name, object_name, row_index, column)
+            self._info("expend table cell at (%s, %s, %d)", window_name, object_name, row_index)
+            return self._client.expendtablecell(window_name, object_name, row_index, column)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -340,8 +427,8 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("uncheck row at (%s, %s, %d)" % (window_name, object_name, row_index))
-            return ldtp.uncheckrow(window_name, object_name, row_index, column)
+            self._info("uncheck row at (%s, %s, %d)", window_name, object_name, row_index)
+            return self._client.uncheckrow(window_name, object_name, row_index, column)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -362,8 +449,11 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("get table row with index (%s, %s, %s)" % (window_name, object_name, row_text))
-            return ldtp.gettablerowindex(window_name, object_name, row_text)
+            self._info("get table row with index (%s, %s, %s)", window_name, object_name, row_text)
+            index = self._table_indexes.get((window_name, object_name))
+            if index is not None:
+                return self._find_indexed_row(index, row_text)
+            return self._client.gettablerowindex(window_name, object_name, row_text)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -384,8 +474,8 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("single click row (%s, %s, %s)" % (window_name, object_name, row_text))
-            return ldtp.singleclickrow(window_name, object_name, row_text)
+            self._info("single click row (%s, %s, %s)", window_name, object_name, row_text)
+            return self._client.singleclickrow(window_name, object_name, row_text)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -403,7 +493,7 @@ class TableKeywords(KeywordGroup):
         """
         try:
             self._info("double click row matching given text")
-            return ldtp.doubleclickrow(window_name, table_name, row_text)
+            return self._client.doubleclickrow(window_name, table_name, row_text)
         except LdtpExecutionError:
             raise LdtpExecutionError("Double click row failed")
 
@@ -430,10 +520,89 @@ class TableKeywords(KeywordGroup):
         """
         try:
             self._info("verify table cell text ")
-            return ldtp.verifytablecell(window_name, object_name, row_index, column_index, row_text)
+            return self._client.verifytablecell(window_name, object_name, row_index, column_index, row_text)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
+    def verify_table_contents(self, window_name, object_name, expected, start_row=0,
+                              partial_match=False):
+        """
+        Verify many table cells against expected values at once
+
+        The table is read with one `Get Table Snapshot` and compared in memory. Every
+        mismatching cell is reported, instead of stopping at the first one, including
+        expected cells in rows or columns the table does not have.
+
+        @param window_name: Window name to type in, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type window_name: string
+        @param object_name: Object name to type in, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type object_name: string
+        @param expected: Expected grid, either a list of rows (each a list of cell values),
+        the path of a CSV file with one line per row, or a dictionary mapping row indexes
+        to the list of their cell values. A None cell value is not checked.
+        @type expected: list, string or dictionary
+        @param start_row: Row index of the first row of a list or CSV grid, default value 0
+        @type start_row: integer
+        @param partial_match: Cells only need to contain the expected text
+        @type partial_match: boolean
+
+        @return: 1 on success, AssertionError listing every mismatch on failure.
+        @rtype: integer
+
+        Examples:
+        | @{row0}= | Create List | Name | Size |
+        | @{row1}= | Create List | a.txt | 3 KB |
+        | @{grid}= | Create List | ${row0} | ${row1} |
+        | Verify Table Contents | ${FRM_NAME} | ${TBL_NAME} | ${grid} |
+        | Verify Table Contents | ${FRM_NAME} | ${TBL_NAME} | ${CURDIR}${/}expected.csv |
+        """
+        if isinstance(expected, six.string_types):
+            expected = self._read_table_csv(expected)
+        if isinstance(expected, dict):
+            rows = dict((int(row), list(values)) for row, values in expected.items())
+        else:
+            rows = dict((int(start_row) + offset, list(values)) for offset, values in enumerate(expected))
+        self._info("verify table contents (%s, %s, %d rows)", window_name, object_name, len(rows))
+        if not rows:
+            return 1
+        row_count = self._client.getrowcount(window_name, object_name)
+        first_row = min(rows)
+        end_row = min(max(rows) + 1, row_count)
+        width = max(len(values) for values in rows.values())
+        # Columns past the last one of the table fail to read, they are
+        # found once and reported as mismatches.
+        column_count = len(probe_columns(self._client, window_name, object_name, first_row, width)) \
+            if first_row < end_row else width
+        actual = {}
+        for chunk_row, chunk in iter_table_chunks(self._client, window_name, object_name,
+                                                  first_row, end_row, range(column_count)):
+            for column, values in chunk.items():
+                for offset, value in enumerate(values):
+                    actual[(chunk_row + offset, column)] = six.text_type(value)
+        mismatches = []
+        checked = 0
+        for row in sorted(rows):
+            for column, value in enumerate(rows[row]):
+                if value is None:
+                    continue
+                checked += 1
+                value = six.text_type(value)
+                if row >= row_count:
+                    mismatches.append("row %d does not exist, expected '%s' in column %d" % (row, value, column))
+                elif column >= column_count:
+                    mismatches.append("column %d does not exist, expected '%s' in row %d" % (column, value, row))
+                elif partial_match and value in actual[(row, column)]:
+                    continue
+                elif value != actual[(row, column)]:
+                    mismatches.append("cell (%d, %d) is '%s', expected '%s'"
+                                      % (row, column, actual[(row, column)], value))
+        if mismatches:
+            raise AssertionError("%d of %d table cells differ:\n%s"
+                                 % (len(mismatches), checked, '\n'.join(mismatches)))
+        return 1
+
     def does_row_exist(self, window_name, object_name, row_text,
                        partial_match=False):
         """
@@ -454,8 +623,11 @@ class TableKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("Does row exist (%s, %s, %s)" % (window_name, object_name, row_text))
-            return ldtp.doesrowexist(window_name, object_name, row_text, partial_match)
+            self._info("Does row exist (%s, %s, %s)", window_name, object_name, row_text)
+            index = self._table_indexes.get((window_name, object_name))
+            if index is not None:
+                return int(index.find(row_text, partial_match) is not None)
+            return self._client.doesrowexist(window_name, object_name, row_text, partial_match)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -482,6 +654,39 @@ class TableKeywords(KeywordGroup):
         """
         try:
             self._info("verify partial table cell ...")
-            return ldtp.verifypartialtablecell(window_name, object_name, row_index, column_index, row_text)
+            return self._client.verifypartialtablecell(window_name, object_name, row_index, column_index, row_text)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
+
+    # Private
+
+    @staticmethod
+    def _find_indexed_row(index, row_text, partial_match=False):
+        row = index.find(row_text, partial_match)
+        if row is None:
+            raise LdtpExecutionError("Unable to get row index: %s" % row_text)
+        return row
+
+    @staticmethod
+    def _read_table_csv(path):
+        if six.PY2:
+            with open(path, 'rb') as f:
+                return [[value.decode('utf-8') for value in row] for row in csv.reader(f)]
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    @staticmethod
+    def _write_table_csv(out_file, chunks):
+        if six.PY2:
+            f = open(out_file, 'wb')
+        else:
+            f = open(out_file, 'w', newline='')
+        with f:
+            writer = csv.writer(f)
+            for _, chunk in chunks:
+                columns = sorted(chunk)
+                for row in zip(*[chunk[column] for column in columns]):
+                    if six.PY2:
+                        row = [six.text_type(value).encode('utf-8') for value in row]
+                    writer.writerow(row)
+        return out_file
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Robot Framework LDTP Library
+
+LDTPLibrary is a gui application testing library for Robot Framework.
+
+It uses the LDTP (Linux Desktop Test Project) libraries internally to control a gui application.
+See http://ldtp.freedesktop.org/wiki/ for more information on LDTP.
+
+@author: Wang Yang <wywincl@gmail.com>
+@copyright: Copyright (c) 2015-2016 Wang Yang
+@license: GPLv3
+
+See 'LICENSE' in the source distribution for more information.
+"""
+
+from ..utils.arguments import is_truthy
+from ..utils.stats import KeywordTimings
+from .keywordgroup import KeywordGroup
+
+
+class TimingKeywords(KeywordGroup):
+    def __init__(self):
+        self._keyword_timings = None
+        self._timing_report = None
+
+    # Public
+
+    def get_keyword_timing_statistics(self):
+        """Returns the latency statistics of the keywords of this library.
+
+        The result is a dictionary mapping each keyword name to a dictionary
+        with its call count and the total, min, max, mean, p50, p90, p95 and
+        p99 latencies in seconds. Keywords called by other keywords of this
+        library are not counted separately.
+
+        Timing is enabled with the ``keyword_timing`` import argument, the same
+        statistics are written to ``timing_report`` at the end of every suite.
+
+        Example:
+        | ${stats}= | Get Keyword Timing Statistics |
+        | Log | ${stats['click']['p90']} |
+        """
+        if self._keyword_timings is None:
+            self._warn('Keyword timing is not enabled, import the library with keyword_timing=True.')
+            return {}
+        statistics = self._keyword_timings.statistics()
+        self._log_list(['%s: %d calls, %.3fs total, %.4fs max' % (name, stats['count'], stats['total'], stats['max'])
+                        for name, stats in sorted(statistics.items())], 'keyword')
+        return statistics
+
+    # Private
+
+    def _enable_keyword_timing(self, keyword_timing, timing_report):
+        if timing_report is None and not is_truthy(keyword_timing):
+            return
+        per_argument = str(keyword_timing).strip().lower() == 'arguments'
+        self._keyword_timings = KeywordTimings(per_argument=per_argument)
+        self._keyword_state.timings = self._keyword_timings
+        self._timing_report = timing_report
+
+    def _write_timing_report(self):
+        if self._keyword_timings is not None and self._timing_report:
+            self._keyword_timings.write_report(self._timing_report)
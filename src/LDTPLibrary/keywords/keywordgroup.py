@@ -15,49 +15,108 @@ See http://ldtp.freedesktop.org/wiki/ for more information on LDTP.
 See 'LICENSE' in the source distribution for more information.
 """
 
-import sys
+import time
 import inspect
 from six import with_metaclass
 
-try:
-    from decorator import decorator
-except SyntaxError:  # decorator module requires Python/Jython 2.4+
-    decorator = None
-if sys.platform == 'cli':
-    decorator = None  # decorator module doesn't work with IronPython 2.6
-
-
-def _run_on_failure_decorator(method, *args, **kwargs):
-    self = args[0]
-    already_in_keyword = getattr(self, "_already_in_keyword",
-                                 False)
-    # If False, we are in the outermost keyword (or in `run_keyword`,
-    # if it's a dynamic library)
-    self._already_in_keyword = True  # Set a flag on the instance so that as we call keywords inside this call and
-    #  this gets run again, we know we're at least one level in.
-    try:
-        return method(*args, **kwargs)
-    except Exception as err:
-        if hasattr(self, '_run_on_failure') and not self._has_run_on_failure:
-            # If we're in an inner keyword, track the fact that we've already run on failure once
-            self._has_run_on_failure = True
-            self._run_on_failure()
-        raise
-    finally:
-        if not already_in_keyword:
-            # If we are in the outer call, reset the flags.
-            self._already_in_keyword = False
-            self._has_run_on_failure = False
+_CO_VARARGS = 0x04
+_CO_VARKEYWORDS = 0x08
+
+# Keyword wrappers are made from this template with the exact signature of
+# the wrapped method, so Robot Framework and libdoc still see the real
+# arguments while a call only costs one extra frame and a few slot lookups.
+# The template is compiled once per distinct signature, not per keyword.
+# Its own names carry a _kw_ prefix so they cannot shadow keyword arguments.
+_KEYWORD_TEMPLATE = """
+def make_keyword(_kw_method, _kw_name, _kw_time):
+    def keyword(%(signature)s):
+        _kw_state = self._keyword_state
+        _kw_outermost = not _kw_state.depth
+        _kw_state.depth += 1
+        if _kw_outermost and _kw_state.timings is not None:
+            _kw_start = _kw_time()
+        try:
+            return _kw_method(%(signature)s)
+        except Exception:
+            if not _kw_state.has_run_on_failure and hasattr(self, '_run_on_failure'):
+                # If we're in an inner keyword, track the fact that we've already run on failure once
+                _kw_state.has_run_on_failure = True
+                self._run_on_failure()
+            raise
+        finally:
+            _kw_state.depth -= 1
+            if _kw_outermost:
+                _kw_state.has_run_on_failure = False
+                if _kw_state.timings is not None:
+                    _kw_state.timings.record(_kw_name, _kw_time() - _kw_start, (%(positional)s,)[1:3])
+                if _kw_state.log_buffer:
+                    self._flush_log_buffer()
+    return keyword
+"""
+_keyword_factories = {}
+
+
+class KeywordState(object):
+    """Per library instance keyword call state used by the keyword wrappers."""
+    __slots__ = ('depth', 'has_run_on_failure', 'timings', 'log_buffer')
+
+    def __init__(self):
+        self.depth = 0
+        self.has_run_on_failure = False
+        self.timings = None
+        self.log_buffer = None
+
+
+class _LazyKeywordState(object):
+    # Non-data descriptor, after the first access the state is found in
+    # the instance dictionary without going through this again.
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        state = instance.__dict__['_keyword_state'] = KeywordState()
+        return state
+
+
+def _signature(method):
+    """Returns the parameters of ``method`` as written in a call, and its
+    positional parameters alone."""
+    code = method.__code__
+    positional = list(code.co_varnames[:code.co_argcount])
+    params = list(positional)
+    index = code.co_argcount
+    if code.co_flags & _CO_VARARGS:
+        params.append('*' + code.co_varnames[index])
+        index += 1
+    if code.co_flags & _CO_VARKEYWORDS:
+        params.append('**' + code.co_varnames[index])
+    return ', '.join(params), ', '.join(positional)
+
+
+def _wrap_keyword(method):
+    signature, positional = _signature(method)
+    factory = _keyword_factories.get(signature)
+    if factory is None:
+        namespace = {}
+        source = _KEYWORD_TEMPLATE % {'signature': signature, 'positional': positional}
+        exec(compile(source, '<keyword>', 'exec'), namespace)
+        factory = _keyword_factories[signature] = namespace['make_keyword']
+    wrapper = factory(method, method.__name__, time.time)
+    wrapper.__name__ = method.__name__
+    wrapper.__defaults__ = method.__defaults__
+    wrapper.__doc__ = method.__doc__
+    wrapper.__module__ = method.__module__
+    wrapper.__dict__.update(method.__dict__)
+    wrapper.__wrapped__ = method
+    return wrapper
 
 
 class KeywordGroupMetaClass(type):
     def __new__(mcs, cls_name, bases, dict_i):
-        if decorator:
-            for name, method in dict_i.items():
-                if not name.startswith('_') and inspect.isroutine(method):
-                    dict_i[name] = decorator(_run_on_failure_decorator, method)
+        for name, method in list(dict_i.items()):
+            if not name.startswith('_') and inspect.isfunction(method):
+                dict_i[name] = _wrap_keyword(method)
         return type.__new__(mcs, cls_name, bases, dict_i)
 
 
 class KeywordGroup(with_metaclass(KeywordGroupMetaClass, object)):
-    pass
+    _keyword_state = _LazyKeywordState()
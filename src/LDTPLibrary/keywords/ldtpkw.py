@@ -16,37 +16,108 @@ See 'LICENSE' in the source distribution for more information.
 """
 
 import sys
+import time
 try:
-    import ldtp
+    from collections import OrderedDict
 except ImportError:
-    if sys.platform != "darwin":
-        raise
-    import atomac.ldtp as ldtp
-from keywordgroup import KeywordGroup
-try:
-    from ldtp.client_exception import LdtpExecutionError
-except ImportError:
-    if sys.platform != "darwin":
-        raise
-    from atomac.ldtp.client_exception import LdtpExecutionError
-from _exception import LdtpError
+    # Python 2.6, fan-out results are not kept in argument order
+    OrderedDict = dict
+from .keywordgroup import KeywordGroup
+from ._exception import LdtpError
 from robot.api.deco import keyword
+from ..utils.client import run_batch
+from ..utils.lazy import ldtp, LdtpExecutionError
+from ..utils.locator import is_glob, same_window
+from ..utils.tree import WindowTree
+from ..utils.waiter import GuiWaiter
 
 try:
     from robot.api import logger
 except ImportError:
     logger = None
 
+_default_encoding_set = False
+
+
+def _set_default_encoding():
+    # Once per process rather than per library instance, reload(sys) also
+    # resets the standard streams on Python 2.
+    global _default_encoding_set
+    if sys.version_info[:2] < (3, 0) and not _default_encoding_set:
+        _default_encoding_set = True
+        reload(sys)
+        sys.setdefaultencoding('utf-8')
+
+
+class _Called(object):
+    """Stands in for the AsyncResult of a call made in the calling thread.
+
+    The call is only made if ``timeout`` has not run out yet, a call that
+    has started is not interrupted.
+    """
+
+    def __init__(self, method, *args):
+        self._method = method
+        self._args = args
+
+    def get(self, timeout=None):
+        if timeout is not None and timeout <= 0:
+            from multiprocessing import TimeoutError
+            raise TimeoutError()
+        return self._method(*self._args)
+
+
+def _as_is(*args):
+    return list(args)
+
+
+# Keywords Run LDTP Batch can send, by normalized keyword name, with the
+# ldtpd method and a function turning the keyword arguments into the
+# arguments of that method, the same way the keyword itself does.
+_BATCH_CALLS = dict(
+    [(name, (name, _as_is)) for name in (
+        'activatewindow', 'check', 'checkrow', 'click', 'closewindow', 'comboselect', 'decrease',
+        'doesmenuitemexist', 'doesrowexist', 'doubleclick', 'doubleclickrow', 'doubleclickrowindex',
+        'enterstring', 'generatekeyevent', 'getallstates', 'getcellsize', 'getcellvalue',
+        'getcombovalue', 'getobjectlist', 'getobjectproperty', 'getobjectsize', 'getrowcount',
+        'getslidervalue', 'gettabcount', 'gettabname', 'gettablerowindex', 'gettextvalue',
+        'getvalue', 'getwindowsize', 'grabfocus', 'guiexist', 'hasstate', 'increase', 'invokemenu',
+        'listsubmenus', 'maximizewindow', 'menucheck', 'menuitemenabled', 'menuuncheck',
+        'minimizewindow', 'mouseleftclick', 'mousemove', 'mouserightclick', 'objectexist', 'remap',
+        'rightclick', 'selectindex', 'selectitem', 'selectlastrow', 'selectmenuitem', 'selectpanel',
+        'selectrow', 'selectrowindex', 'selecttab', 'setcellvalue', 'settextvalue', 'setvalue',
+        'simulatemousemove', 'singleclickrow', 'stateenabled', 'uncheck', 'uncheckrow',
+        'unmaximizewindow', 'unminimizewindow', 'verifybuttoncount', 'verifycheck',
+        'verifymenucheck', 'verifymenuuncheck', 'verifypartialtablecell', 'verifyselect',
+        'verifystatusbarvisible', 'verifytablecell', 'verifyuncheck')] +
+    [('expandtablecell', ('expendtablecell', _as_is)),
+     ('launchapp', ('launchapp', lambda cmd, lang='zh_CN.UTF-8', delay=0, env=1, *args:
+                    [cmd, list(args), int(delay), int(env), lang])),
+     ('selecttabindex', ('selecttabindex', lambda window_name, tab_list_name, tab_index:
+                         [window_name, tab_list_name, int(tab_index)])),
+     ('multiselect', ('multiselect', lambda window_name, object_name, row_text_list, partial_match=False:
+                      [window_name, object_name, row_text_list])),
+     ('multiremove', ('multiremove', lambda window_name, object_name, row_text_list, partial_match=False:
+                      [window_name, object_name, row_text_list])),
+     ('generatemouseevent', ('generatemouseevent', lambda x, y, eventType='b1c':
+                             [int(x), int(y), eventType]))])
+
 
 class LDTPKeywords(KeywordGroup):
     # Public
 
     def __init__(self):
         self._client = ldtp
-
-        if sys.version_info[:2] < (3, 0):
-            reload(sys)
-            sys.setdefaultencoding('utf-8')
+        self._object_cache = None
+        self._window_registry = None
+        self._locator = None
+        self._property_cache = None
+        self._waiter = GuiWaiter()
+        self._watching_window_events = False
+        self._fanout_workers = 8
+        self._fanout_timeout = 30
+        self._fanout_pool = None
+        _set_default_encoding()
 
     def launch_app(self, cmd, lang='zh_CN.UTF-8', delay=0, env=1, *args):
         """
@@ -71,7 +142,7 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("launch app (APP Name: %s)..." % cmd)
+            self._info("launch app (APP Name: %s)...", cmd)
             # print("*INFO* Launch app [%s]...\r\n" % cmd)
             return self._client.launchapp(cmd, list(args), int(delay), int(env), lang)
         except LdtpError:
@@ -95,9 +166,9 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("mouse click... （%s, %s)" % (window_name, object_name))
+            self._info("mouse click... （%s, %s)", window_name, object_name)
             # print("*INFO* Mouse click ... [%s, %s] \r\n" % (window_name, object_name))
-            return ldtp.click(window_name, object_name)
+            return self._client.click(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("click failed, please check if the input parameters are correct.")
 
@@ -118,9 +189,9 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("get text value ... (%s, %s)" % (window_name, object_name))
+            self._info("get text value ... (%s, %s)", window_name, object_name)
             # print("*INFO* get text value ... [%s, %s]\r\n" % (window_name, object_name))
-            return ldtp.gettextvalue(window_name, object_name)
+            return self._client.gettextvalue(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("get text value failed, please check if the input parameters are correct. ")
 
@@ -144,9 +215,9 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("set text value ... (%s, %s)\r\n" % (window_name, object_name))
+            self._info("set text value ... (%s, %s)\r\n", window_name, object_name)
             # print("*INFO* set text value ... [%s, %s]\r\n" % (window_name, object_name))
-            return ldtp.settextvalue(window_name, object_name, data)
+            return self._client.settextvalue(window_name, object_name, data)
         except LdtpExecutionError:
             raise LdtpExecutionError(" set text value failed, please check if the input parameters are correct. ")
 
@@ -169,9 +240,9 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("select menu item ... (%s, %s)" % (window_name, object_name))
+            self._info("select menu item ... (%s, %s)", window_name, object_name)
             # print("*INFO* select menu item ... [%s, %s]\r\n" % (window_name, object_name))
-            return ldtp.selectmenuitem(window_name, object_name)
+            return self._client.selectmenuitem(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("select menu item failed, please check if the input parameters are correct. ")
 
@@ -195,8 +266,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("select row (%s, %s, %s)" % (window_name, object_name, row_text))
-            return ldtp.selectrow(window_name, object_name, row_text)
+            self._info("select row (%s, %s, %s)", window_name, object_name, row_text)
+            return self._client.selectrow(window_name, object_name, row_text)
         except LdtpExecutionError:
             raise LdtpExecutionError("select row failed, please check if the input parameters are correct. ")
 
@@ -215,8 +286,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("activate window %s" % window_name)
-            return ldtp.activatewindow(window_name)
+            self._info("activate window %s", window_name)
+            return self._client.activatewindow(window_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("activate window failed, please check if the input parameters are correct. ")
 
@@ -238,8 +309,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("gui exist (%s, %s)" % (window_name, object_name))
-            return ldtp.guiexist(window_name, object_name)
+            self._info("gui exist (%s, %s)", window_name, object_name)
+            return self._client.guiexist(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("gui exist failed, please check if the input parameters are correct. ")
 
@@ -247,6 +318,12 @@ class LDTPKeywords(KeywordGroup):
         """
         Wait till a window or component exists.
 
+        The GUI is polled from the library with a backoff starting at a few milliseconds,
+        so the keyword returns shortly after the window or component appears.
+        With the module level ldtp client, i.e. pool_size=0, window create and destroy
+        events of ldtp also wake the wait up at once. The library's pooled client gets
+        no events from ldtpd and only polls.
+
         :param window_name:  Window name to look for, either full name,
         LDTP's name convention, or a Unix glob.
 
@@ -271,8 +348,9 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info(
-                    "wait till a window or component exists. [%s, %s, %d]" % (window_name, object_name, gui_time_out))
-            return ldtp.waittillguiexist(window_name, object_name, gui_time_out, state)
+                    "wait till a window or component exists. [%s, %s, %s]", window_name, object_name, gui_time_out)
+            return int(self._wait_until(lambda: self._gui_condition_met(window_name, object_name, state),
+                                        gui_time_out))
         except LdtpExecutionError:
             raise LdtpExecutionError("exec ldtp.waittillguiexist failed")
 
@@ -280,6 +358,12 @@ class LDTPKeywords(KeywordGroup):
         """
         Wait till a window or component doesn't exist.
 
+        The GUI is polled from the library with a backoff starting at a few milliseconds,
+        so the keyword returns shortly after the window or component goes away.
+        With the module level ldtp client, i.e. pool_size=0, window create and destroy
+        events of ldtp also wake the wait up at once. The library's pooled client gets
+        no events from ldtpd and only polls.
+
         :param window_name:  Window name to look for, either full name,
         LDTP's name convention, or a Unix glob.
 
@@ -300,11 +384,90 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info(
-                    "wait till a window or component exists. [%s, %s, %d]" % (window_name, object_name, gui_time_out))
-            return ldtp.waittillguinotexist(window_name, object_name, gui_time_out)
+                    "wait till a window or component not exists. [%s, %s, %s]", window_name, object_name, gui_time_out)
+            return int(self._wait_until(lambda: not self._gui_exist_now(window_name, object_name), gui_time_out))
         except LdtpExecutionError:
             raise LdtpExecutionError("exec ldtp.waittillguinotexist failed")
 
+    def wait_until_any_gui_exists(self, conditions, gui_time_out=30):
+        """
+        Wait till any one of several windows or components exists.
+
+        All conditions are checked in one polling loop against a single deadline, e.g. to
+        wait for either the main window or an error dialog.
+
+        :param conditions: list of conditions, each a window name or a list of window name,
+        object name and optionally object state, as taken by `Wait Till Gui Exist`.
+
+        @type conditions: list
+
+        :param gui_time_out: Wait timeout in seconds.
+
+        @type gui_time_out: integer
+
+        :return: the first condition found to exist, None if none did before the timeout.
+
+        Examples:
+
+        |  *Test Cases*  |     *Returns*     |          *Action*          |   *Argument*   |  *Argument*  |
+        |  Example_Test  |  @{error}=        |       Create List          |  dlgError      |  btnOK       |
+        |                |  @{conditions}=   |       Create List          |  frmCalculator |  ${error}    |
+        |                |  ${found}=        | Wait Until Any GUI Exists  |  ${conditions} |  10          |
+        """
+        conditions = list(conditions)
+        found = []
+
+        def any_exists():
+            for condition in conditions:
+                if self._gui_condition_met(*self._gui_condition(condition)):
+                    found.append(condition)
+                    return True
+            return False
+
+        try:
+            self._info("wait till any of %d windows or components exists. [%s]", len(conditions), gui_time_out)
+            if self._wait_until(any_exists, gui_time_out):
+                return found[0]
+            return None
+        except LdtpExecutionError:
+            raise LdtpExecutionError("wait until any gui exists failed")
+
+    def wait_until_all_gui_exist(self, conditions, gui_time_out=30):
+        """
+        Wait till every one of several windows or components has been found to exist.
+
+        All conditions are checked in one polling loop against a single deadline, conditions
+        already met are not checked again.
+
+        :param conditions: list of conditions, each a window name or a list of window name,
+        object name and optionally object state, as taken by `Wait Till Gui Exist`.
+
+        @type conditions: list
+
+        :param gui_time_out: Wait timeout in seconds.
+
+        @type gui_time_out: integer
+
+        :return: 1 if all conditions were met, 0 if not.
+
+        @rtype: integer
+        """
+        pending = list(conditions)
+
+        def all_exist():
+            pending[:] = [condition for condition in pending
+                          if not self._gui_condition_met(*self._gui_condition(condition))]
+            return not pending
+
+        try:
+            self._info("wait till all of %d windows or components exist. [%s]", len(pending), gui_time_out)
+            result = self._wait_until(all_exist, gui_time_out)
+            if pending:
+                self._info("still missing: %s", pending)
+            return int(result)
+        except LdtpExecutionError:
+            raise LdtpExecutionError("wait until all gui exist failed")
+
     def close_window(self, window_name=''):
         """
         [关键字概要] 关闭窗口
@@ -321,8 +484,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("close window (%s)" % window_name)
-            return ldtp.closewindow(window_name)
+            self._info("close window (%s)", window_name)
+            return self._client.closewindow(window_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("close window failed, please check if the input parameters are correct. ")
 
@@ -344,8 +507,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("get window size of (%s) " % window_name)
-            return ldtp.getwindowsize(window_name)
+            self._info("get window size of (%s) ", window_name)
+            return self._client.getwindowsize(window_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("get window size failed!")
 
@@ -362,8 +525,8 @@ class LDTPKeywords(KeywordGroup):
         :return: Number of rows.
         """
         try:
-            self._info("get row count of table [%s, %s]" % (window_name, object_name))
-            return ldtp.getrowcount(window_name, object_name)
+            self._info("get row count of table [%s, %s]", window_name, object_name)
+            return self._client.getrowcount(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("get row count of table failed")
 
@@ -378,7 +541,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("maximize a windows")
-            return ldtp.maximizewindow(window_name)
+            return self._client.maximizewindow(window_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("maximize window failed")
 
@@ -393,7 +556,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("unmaximize a windows")
-            return ldtp.unmaximizewindow(window_name)
+            return self._client.unmaximizewindow(window_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("unmaximize window failed")
 
@@ -408,7 +571,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("minimize a windows")
-            return ldtp.minimizewindow(window_name)
+            return self._client.minimizewindow(window_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("minimize window failed")
 
@@ -423,7 +586,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("unminimize a windows")
-            return ldtp.unminimizewindow(window_name)
+            return self._client.unminimizewindow(window_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("unminimize window failed")
 
@@ -443,7 +606,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("enter string with keyboard")
-            return ldtp.enterstring(window_name, object_name, data)
+            return self._client.enterstring(window_name, object_name, data)
         except LdtpExecutionError:
             raise LdtpExecutionError("enter string with keyboard failed")
 
@@ -483,10 +646,10 @@ class LDTPKeywords(KeywordGroup):
         @rtype: string
         """
         try:
-            self._info("screen capture, and the out file: %s " % out_file)
-            self._html('the capture picture is <a href="%s"><img src="%s" width="800px">%s</a>' % (out_file, out_file,
-                                                                                                   out_file))
-            return ldtp.imagecapture(window_name, out_file, x, y, width, height)
+            self._info("screen capture, and the out file: %s ", out_file)
+            self._html('the capture picture is <a href="%s"><img src="%s" width="800px">%s</a>', out_file, out_file,
+                       out_file)
+            return self._client.imagecapture(window_name, out_file, x, y, width, height)
         except LdtpExecutionError:
             raise LdtpExecutionError("image capture failed")
 
@@ -526,9 +689,9 @@ class LDTPKeywords(KeywordGroup):
         @rtype: string
         """
         try:
-            self._info("screen capture without embedding, and the out file: %s " % out_file)
-            self._html('the capture picture is <a href="%s">%s</a>' % (out_file, out_file))
-            return ldtp.imagecapture(window_name, out_file, x, y, width, height)
+            self._info("screen capture without embedding, and the out file: %s ", out_file)
+            self._html('the capture picture is <a href="%s">%s</a>', out_file, out_file)
+            return self._client.imagecapture(window_name, out_file, x, y, width, height)
         except LdtpExecutionError:
             raise LdtpExecutionError("image capture failed")
 
@@ -550,8 +713,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("object exist :(%s, %s)" % (window_name, object_name))
-            return ldtp.objectexist(window_name, object_name)
+            self._info("object exist :(%s, %s)", window_name, object_name)
+            return self._client.objectexist(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("objectexist failed")
 
@@ -566,8 +729,8 @@ class LDTPKeywords(KeywordGroup):
         :return:
         """
         try:
-            self._info("check item (%s, %s)" % (window_name, object_name))
-            return ldtp.check(window_name, object_name)
+            self._info("check item (%s, %s)", window_name, object_name)
+            return self._client.check(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("check item failed")
 
@@ -582,8 +745,8 @@ class LDTPKeywords(KeywordGroup):
         :return:
         """
         try:
-            self._info("uncheck item (%s, %s)" % (window_name, object_name))
-            return ldtp.uncheck(window_name, object_name)
+            self._info("uncheck item (%s, %s)", window_name, object_name)
+            return self._client.uncheck(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("uncheck item failed")
 
@@ -599,7 +762,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("verify check items")
-            return ldtp.verifycheck(window_name, object_name)
+            return self._client.verifycheck(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("verify check items failed")
 
@@ -615,7 +778,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("verify uncheck items")
-            return ldtp.verifyuncheck(window_name, object_name)
+            return self._client.verifyuncheck(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("verify uncheck items failed")
 			
@@ -633,7 +796,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("select panel based on index")
-            return ldtp.selectpanel(window_name, object_name, index)
+            return self._client.selectpanel(window_name, object_name, index)
         except LdtpExecutionError:
             raise LdtpExecutionError("select panel based on index failed")
 
@@ -649,7 +812,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("check a menu item")
-            return ldtp.menucheck(window_name, object_name)
+            return self._client.menucheck(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("check a menu item failed")
 
@@ -665,7 +828,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("uncheck a menu item")
-            return ldtp.menuuncheck(window_name, object_name)
+            return self._client.menuuncheck(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("uncheck a menu item failed")
 
@@ -680,8 +843,8 @@ class LDTPKeywords(KeywordGroup):
         :return:
         """
         try:
-            self._info("verify a menu item is checked (%s, %s)" % (window_name, object_name))
-            return ldtp.verifymenucheck(window_name, object_name)
+            self._info("verify a menu item is checked (%s, %s)", window_name, object_name)
+            return self._client.verifymenucheck(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("verify a menu item is checked failed")
 
@@ -696,8 +859,8 @@ class LDTPKeywords(KeywordGroup):
         :return:
         """
         try:
-            self._info("verify a menu item is unchecked (%s, %s)" % (window_name, object_name))
-            result = ldtp.verifymenuuncheck(window_name, object_name)
+            self._info("verify a menu item is unchecked (%s, %s)", window_name, object_name)
+            result = self._client.verifymenuuncheck(window_name, object_name)
             print (result)
             return result
         except LdtpExecutionError:
@@ -722,8 +885,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("Get object property value (%s, %s, %s)" % (window_name, object_name, property_name))
-            return ldtp.getobjectproperty(window_name, object_name, property_name)
+            self._info("Get object property value (%s, %s, %s)", window_name, object_name, property_name)
+            return self._client.getobjectproperty(window_name, object_name, property_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("get object property failed")
 
@@ -746,7 +909,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("double click the mouse")
-            return ldtp.doubleclick(window_name, object_name)
+            return self._client.doubleclick(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("Double Click failed")
 
@@ -767,8 +930,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("Get all states of given object (%s, %s)" % (window_name, object_name))
-            return ldtp.getallstates(window_name, object_name)
+            self._info("Get all states of given object (%s, %s)", window_name, object_name)
+            return self._client.getallstates(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError("get all states failed")
 
@@ -784,8 +947,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info('state enabled of given component (%s, %s)' % (window_name, component_name))
-            return ldtp.stateenabled(window_name, component_name)
+            self._info('state enabled of given component (%s, %s)', window_name, component_name)
+            return self._client.stateenabled(window_name, component_name)
         except LdtpExecutionError:
             raise LdtpExecutionError('state enabled failed.')
 
@@ -800,8 +963,8 @@ class LDTPKeywords(KeywordGroup):
         :return: 1 on success, 0 on failure
         """
         try:
-            self._info('menu item enabled of given menu item (%s, %s)' % (window_name, menu_item))
-            return ldtp.menuitemenabled(window_name, menu_item)
+            self._info('menu item enabled of given menu item (%s, %s)', window_name, menu_item)
+            return self._client.menuitemenabled(window_name, menu_item)
         except LdtpExecutionError:
             raise LdtpExecutionError("menu item enabled failed.")
 
@@ -818,8 +981,8 @@ class LDTPKeywords(KeywordGroup):
         :return: 1 on success, LdtpExecutionError exception on failure
         """
         try:
-            self._info('combo select (%s, %s, %s)' % (window_name, component_name, item_name))
-            return ldtp.comboselect(window_name, component_name, item_name)
+            self._info('combo select (%s, %s, %s)', window_name, component_name, item_name)
+            return self._client.comboselect(window_name, component_name, item_name)
         except LdtpExecutionError:
             raise LdtpExecutionError('combo select failed.')
 
@@ -836,8 +999,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info('select tab (%s, %s, %s)' % (window_name, tab_list_name, tab_name))
-            return ldtp.selecttab(window_name, tab_list_name, tab_name)
+            self._info('select tab (%s, %s, %s)', window_name, tab_list_name, tab_name)
+            return self._client.selecttab(window_name, tab_list_name, tab_name)
         except LdtpExecutionError:
             raise LdtpExecutionError('select tab failed.')
 
@@ -855,8 +1018,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info('select tab index(%s, %s, %s)' % (window_name, tab_list_name, tab_index))
-            return ldtp.selecttabindex(window_name, tab_list_name, int(tab_index))
+            self._info('select tab index(%s, %s, %s)', window_name, tab_list_name, tab_index)
+            return self._client.selecttabindex(window_name, tab_list_name, int(tab_index))
         except LdtpExecutionError:
             raise LdtpExecutionError('select tab index failed.')
 
@@ -874,8 +1037,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info('set value (%s, %s, %s)' % (window_name, spin_button_name, value))
-            return ldtp.setvalue(window_name, spin_button_name, value)
+            self._info('set value (%s, %s, %s)', window_name, spin_button_name, value)
+            return self._client.setvalue(window_name, spin_button_name, value)
         except LdtpExecutionError:
             raise LdtpExecutionError('set value failed.')
 
@@ -891,8 +1054,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("get value of (%s, %s)" % (window_name, spin_button_name))
-            return ldtp.getvalue(window_name, spin_button_name)
+            self._info("get value of (%s, %s)", window_name, spin_button_name)
+            return self._client.getvalue(window_name, spin_button_name)
         except LdtpExecutionError:
             raise LdtpExecutionError('get value failed.')
 
@@ -908,8 +1071,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info('get object size of (%s, %s)' % (window_name, object_name))
-            return ldtp.getobjectsize(window_name, object_name)
+            self._info('get object size of (%s, %s)', window_name, object_name)
+            return self._client.getobjectsize(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError('get object size failed.')
 
@@ -940,8 +1103,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info('(%s,%s) has state (%s) or not.' % (window_name, object_name, state))
-            return ldtp.hasstate(window_name, object_name, state, gui_time_out)
+            self._info('(%s,%s) has state (%s) or not.', window_name, object_name, state)
+            return self._client.hasstate(window_name, object_name, state, gui_time_out)
         except LdtpExecutionError:
             raise LdtpExecutionError('has state failed.')
 
@@ -964,8 +1127,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info('grab focus (%s, %s)' % (window_name, object_name))
-            return ldtp.grabfocus(window_name, object_name)
+            self._info('grab focus (%s, %s)', window_name, object_name)
+            return self._client.grabfocus(window_name, object_name)
         except LdtpExecutionError:
             raise LdtpExecutionError('grab focus object failed.')
 
@@ -986,8 +1149,8 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info('remap (%s)' % window_name)
-            return ldtp.remap(window_name)
+            self._info('remap (%s)', window_name)
+            return self._client.remap(window_name)
         except LdtpExecutionError as e:
             self._debug(e.message)
             raise LdtpExecutionError('remap failed.')
@@ -1006,7 +1169,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info('wait ' + timeout)
-            return ldtp.wait(timeout)
+            return self._client.wait(timeout)
         except LdtpExecutionError:
             raise LdtpExecutionError('wait exec failed.')
 
@@ -1026,8 +1189,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("generate mouse event (%s) at point (%d, %d)" % (eventType, x, y))
-            return ldtp.generatemouseevent(int(x), int(y), eventType)
+            self._info("generate mouse event (%s) at point (%d, %d)", eventType, x, y)
+            return self._client.generatemouseevent(int(x), int(y), eventType)
         except LdtpError:
             raise LdtpError('generate mouse event failed, please check the parameters.')
 
@@ -1041,22 +1204,31 @@ class LDTPKeywords(KeywordGroup):
         :return: Returns 1 on success, LdtpExecutionError exception will be thrown on failure
         """
         try:
-            self._info("generate key event with <%s>" % data)
-            return ldtp.generatekeyevent(data)
+            self._info("generate key event with <%s>", data)
+            return self._client.generatekeyevent(data)
         except LdtpExecutionError as e:
             print (e.message)
             raise LdtpExecutionError
 
-    def get_window_list(self):
+    def get_window_list(self, max_age=None):
         """
         Gets all the window name, that are currently opened. If none of the windows are opened, then LdtpExecutionError
          will be thrown.
 
+        When the library is imported with a positive window_list_max_age, the list is kept and
+        read again from ldtpd only once it is older than that, or after a keyword that may
+        have opened or closed windows. `Gui Exist` of a window answers from the same list.
+
+        :param max_age: seconds the returned list may be old, default window_list_max_age.
+        0 always reads a fresh list.
+
         :return: windows list
         """
         try:
             self._info("get window list ")
-            return ldtp.getwindowlist()
+            if max_age is not None and self._window_registry is not None:
+                self._window_registry.expire(max_age)
+            return self._client.getwindowlist()
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1074,11 +1246,52 @@ class LDTPKeywords(KeywordGroup):
         @rtype: list
         """
         try:
-            self._info("get object list of (%s)" % window_name)
-            return ldtp.getobjectlist(window_name)
+            self._info("get object list of (%s)", window_name)
+            return self._client.getobjectlist(window_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
+    def get_window_tree_snapshot(self, window_name, out_file=None, chunk_size=100):
+        """
+        Get the name, role, label, states, size and parent of every object in given GUI.
+
+        The five calls per object are sent in batches of chunk_size objects, each batch
+        in a single request to ldtpd when the library uses its own client, instead of
+        one request per call.
+
+        Values of an object that could not be read are left empty and logged as warnings,
+        the errors are kept in the errors of the snapshot and in the header of out_file.
+        The keyword fails if the window is closed while it is read.
+
+        @param window_name: Window name to look for, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type window_name: string
+        @param out_file: file to write the snapshot to as JSON lines, one object per line,
+        gzip compressed when the name ends with .gz
+        @type out_file: string
+        @param chunk_size: Number of objects read per request, default value 100
+        @type chunk_size: integer
+
+        @return: the snapshot, whose items are dictionaries with name, role, label, states,
+        size and parent keys, or the path of out_file when given.
+        @rtype: WindowTree
+
+        Examples:
+        | ${tree}= | Get Window Tree Snapshot | ${FRM_NAME} |
+        | Should Be Equal | ${tree['btn1']['role']} | push_button |
+        | Get Window Tree Snapshot | ${FRM_NAME} | out_file=${OUTPUTDIR}${/}calculator.jsonl |
+        """
+        try:
+            self._info("get window tree snapshot of (%s)", window_name)
+            tree = WindowTree.fetch(self._client, window_name, chunk_size)
+        except LdtpExecutionError as e:
+            raise LdtpExecutionError("get window tree snapshot failed: %s" % e)
+        for name, errors in sorted(tree.errors.items()):
+            self._warn("could not read %s of (%s): %s", name, window_name, '; '.join(errors))
+        if out_file:
+            return tree.write(out_file)
+        return tree
+
     def get_object_name_at_coords(self, wait=5):
         """
         Get object name at the mouse coordinates
@@ -1090,7 +1303,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("get object name at the mouse coordinates ")
-            return ldtp.getobjectnameatcoords(wait)
+            return self._client.getobjectnameatcoords(wait)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1114,7 +1327,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("Mouse left click on an object")
-            return ldtp.mouseleftclick(window_name, object_name)
+            return self._client.mouseleftclick(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1138,7 +1351,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("Mouse right click on an object")
-            return ldtp.mouserightclick(window_name, object_name)
+            return self._client.mouserightclick(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1161,8 +1374,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("Mouse move on object (%s) " % object_name)
-            return ldtp.mousemove(window_name, object_name)
+            self._info("Mouse move on object (%s) ", object_name)
+            return self._client.mousemove(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1193,8 +1406,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("simulate mouse move from (%d, %d) to (%d, %d)" % (source_x, source_y, dest_x, dest_y))
-            return ldtp.simulatemousemove(source_x, source_y, dest_x, dest_y, delay)
+            self._info("simulate mouse move from (%d, %d) to (%d, %d)", source_x, source_y, dest_x, dest_y)
+            return self._client.simulatemousemove(source_x, source_y, dest_x, dest_y, delay)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1217,8 +1430,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("Get tab count (%s, %s)" % (window_name, object_name))
-            return ldtp.gettabcount(window_name, object_name)
+            self._info("Get tab count (%s, %s)", window_name, object_name)
+            return self._client.gettabcount(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1245,8 +1458,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: string
         """
         try:
-            self._info("get tab name (%s, %s, %d)" % (window_name, object_name, tab_index))
-            return ldtp.gettabname(window_name, object_name, tab_index)
+            self._info("get tab name (%s, %s, %d)", window_name, object_name, tab_index)
+            return self._client.gettabname(window_name, object_name, tab_index)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1274,7 +1487,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("select combo box item or layered pane based on index")
-            return ldtp.selectindex(window_name, object_name, item_index)
+            return self._client.selectindex(window_name, object_name, item_index)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1306,7 +1519,7 @@ class LDTPKeywords(KeywordGroup):
         """
         try:
             self._info("Select combo box / layered pane item")
-            return ldtp.selectitem(window_name, object_name, item_name)
+            return self._client.selectitem(window_name, object_name, item_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1329,8 +1542,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: string
         """
         try:
-            self._info("Get current selected combobox value (%s-->%s)" % (window_name, object_name))
-            return ldtp.getcombovalue(window_name, object_name)
+            self._info("Get current selected combobox value (%s-->%s)", window_name, object_name)
+            return self._client.getcombovalue(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1357,8 +1570,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: integer
         """
         try:
-            self._info("Verify the item selected in combo box (%s-->%s[:%s])" % (window_name, object_name, item_name))
-            return ldtp.verifyselect(window_name, object_name, item_name)
+            self._info("Verify the item selected in combo box (%s-->%s[:%s])", window_name, object_name, item_name)
+            return self._client.verifyselect(window_name, object_name, item_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1373,8 +1586,8 @@ class LDTPKeywords(KeywordGroup):
         :return: 1 on success, 0 on failure
         """
         try:
-            self._info("check whether the status bar (%s-->%s) is visible or not" % (window_name, status_bar_name))
-            return ldtp.verifystatusbarvisible(window_name, status_bar_name)
+            self._info("check whether the status bar (%s-->%s) is visible or not", window_name, status_bar_name)
+            return self._client.verifystatusbarvisible(window_name, status_bar_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1392,9 +1605,9 @@ class LDTPKeywords(KeywordGroup):
 
         """
         try:
-            self._info("Verifies whether the toolbar(%s-->%s) button count matches with the argument count (%d)" %
-                       (window_name, toolbar_name, count))
-            return ldtp.verifybuttoncount(window_name, toolbar_name, count)
+            self._info("Verifies whether the toolbar(%s-->%s) button count matches with the argument count (%d)",
+                       window_name, toolbar_name, count)
+            return self._client.verifybuttoncount(window_name, toolbar_name, count)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1424,8 +1637,8 @@ class LDTPKeywords(KeywordGroup):
          @rtype: integer
          """
         try:
-            self._info("check menu item exist (%s-->%s)" % (window_name, object_name))
-            return ldtp.doesmenuitemexist(window_name, object_name, strict_hierarchy)
+            self._info("check menu item exist (%s-->%s)", window_name, object_name)
+            return self._client.doesmenuitemexist(window_name, object_name, strict_hierarchy)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1448,8 +1661,8 @@ class LDTPKeywords(KeywordGroup):
         @rtype: list
         """
         try:
-            self._info("list children of menu item (%s-->%s)" % (window_name, object_name))
-            return ldtp.listsubmenus(window_name, object_name)
+            self._info("list children of menu item (%s-->%s)", window_name, object_name)
+            return self._client.listsubmenus(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1473,8 +1686,8 @@ class LDTPKeywords(KeywordGroup):
         """
 
         try:
-            self._info("Invoke menu item (%s-->%s)" % (window_name, object_name))
-            return ldtp.invokemenu(window_name, object_name)
+            self._info("Invoke menu item (%s-->%s)", window_name, object_name)
+            return self._client.invokemenu(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1498,8 +1711,8 @@ class LDTPKeywords(KeywordGroup):
         """
 
         try:
-            self._info("Get slider value (%s, %s)" % (window_name, object_name))
-            return ldtp.getslidervalue(window_name, object_name)
+            self._info("Get slider value (%s, %s)", window_name, object_name)
+            return self._client.getslidervalue(window_name, object_name)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1523,8 +1736,8 @@ class LDTPKeywords(KeywordGroup):
         """
 
         try:
-            self._info("Increase slider value (%s, %s)" % (window_name, object_name))
-            return ldtp.increase(window_name, object_name, iterations)
+            self._info("Increase slider value (%s, %s)", window_name, object_name)
+            return self._client.increase(window_name, object_name, iterations)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
 
@@ -1548,7 +1761,280 @@ class LDTPKeywords(KeywordGroup):
         """
 
         try:
-            self._info("Decrease slider value (%s, %s)" % (window_name, object_name))
-            return ldtp.decrease(window_name, object_name, iterations)
+            self._info("Decrease slider value (%s, %s)", window_name, object_name)
+            return self._client.decrease(window_name, object_name, iterations)
         except LdtpExecutionError as e:
             raise LdtpExecutionError(e.message)
+
+    def run_ldtp_batch(self, operations, fail_on_error=True):
+        """
+        Run a list of LDTP operations in a single request to ldtpd.
+
+        Each operation is a list whose first item is the keyword name, e.g. `Set Cell Value`
+        or set_cell_value, followed by the arguments of that keyword. The batch is sent with
+        system.multicall when ldtpd supports it, otherwise the requests are pipelined over one
+        connection, so 200 cell edits cost one round trip instead of 200.
+
+        Only keywords sending a single ldtpd call can be batched. Others, like `Wait Till Gui
+        Exist` or `Capture Windows Screenshot`, and operations with invalid arguments fail the
+        keyword before anything is sent.
+
+        @param operations: list of operations, each a list of keyword name and arguments
+
+        @type operations: list
+
+        @param fail_on_error: Fail once the whole batch has run if any operation failed,
+        otherwise only log the errors.
+
+        @type fail_on_error: boolean
+
+        @return: list of results in operation order, None for failed operations.
+
+        @rtype: list
+
+        Examples:
+
+        |  *Test Cases*  |  *Returns*   |    *Action*    |    *Argument*   |   *Argument*  | *Argument* | *Argument* | *Argument* |
+        |  Example_Test  |  @{op1}=     |  Create List   |  Set Cell Value | ${FRM_NAME}   | ${TBL_NAME} | ${0}      | ${1}       |
+        |                |  @{op2}=     |  Create List   |  Check Row      | ${FRM_NAME}   | ${TBL_NAME} | ${1}      |            |
+        |                |  @{ops}=     |  Create List   |  ${op1}         | ${op2}        |             |           |            |
+        |                |  @{results}= | Run LDTP Batch |  ${ops}         |               |             |           |            |
+        """
+        calls = [self._batch_call(operation[0], operation[1:]) for operation in operations]
+        self._info("run ldtp batch of %d operations", len(calls))
+        outcomes = run_batch(self._client, calls)
+        errors = ['%d: %s failed: %s' % (index + 1, calls[index][0], error)
+                  for index, (_, error) in enumerate(outcomes) if error is not None]
+        if errors and fail_on_error:
+            raise LdtpExecutionError("ldtp batch failed:\n" + '\n'.join(errors))
+        for error in errors:
+            self._warn(error)
+        return [result for result, _ in outcomes]
+
+    def get_states_of_objects(self, window_name, *object_names):
+        """
+        Get the states of many objects of a window at once
+
+        The objects are read concurrently, see `Objects Exist`.
+
+        @param window_name: Window name to look for, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type window_name: string
+        @param object_names: Object names to look for
+        @type object_names: string
+
+        @return: dictionary mapping each object name to its list of states
+        @rtype: dictionary
+
+        Examples:
+        | ${states}= | Get States Of Objects | ${FRM_NAME} | chkBold | chkItalic |
+        | Should Contain | ${states['chkBold']} | checked |
+        """
+        self._info("get states of %d objects of (%s)", len(object_names), window_name)
+        return self._fan_out('getallstates', window_name, object_names)
+
+    def get_text_values(self, window_name, *object_names):
+        """
+        Get the texts of many objects of a window at once
+
+        The objects are read concurrently, see `Objects Exist`.
+
+        @param window_name: Window name to look for, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type window_name: string
+        @param object_names: Object names to look for
+        @type object_names: string
+
+        @return: dictionary mapping each object name to its text
+        @rtype: dictionary
+
+        Examples:
+        | ${texts}= | Get Text Values | ${FRM_NAME} | txtName | txtAddress |
+        | Should Be Equal | ${texts['txtName']} | John |
+        """
+        self._info("get text values of %d objects of (%s)", len(object_names), window_name)
+        return self._fan_out('gettextvalue', window_name, object_names)
+
+    def objects_exist(self, window_name, *object_names):
+        """
+        Check whether many objects of a window exist at once
+
+        The calls are made concurrently on a pool of fanout_workers threads, see the
+        library import arguments, and all have to answer within fanout_timeout seconds.
+        The keyword fails, naming every object that failed, if any call fails or times out.
+        With the module level ldtp client, i.e. pool_size=0, the calls are made one by one
+        and the objects left when fanout_timeout has passed are not read at all.
+
+        @param window_name: Window name to look for, either full name,
+        LDTP's name convention, or a Unix glob.
+        @type window_name: string
+        @param object_names: Object names to look for
+        @type object_names: string
+
+        @return: dictionary mapping each object name to 1 if it exists, else 0
+        @rtype: dictionary
+
+        Examples:
+        | @{boxes}= | Create List | chkBold | chkItalic | chkUnderline |
+        | ${exist}= | Objects Exist | ${FRM_NAME} | @{boxes} |
+        | Should Be Equal As Integers | ${exist['chkBold']} | 1 |
+        """
+        self._info("objects exist: %d objects of (%s)", len(object_names), window_name)
+        return self._fan_out('objectexist', window_name, object_names)
+
+    def invalidate_object_cache(self, window_name=None):
+        """
+        Drop the cached object list and existence checks of a window, or of all windows.
+
+        Keywords that can change the UI already do this, use it when the application
+        changes a window on its own. Does nothing unless the library was imported with
+        a positive object_cache_ttl. Also drops the cached properties and states of the
+        window, and all names resolved by resolve_locators.
+
+        @param window_name: Window name as given to the cached keywords, None for all windows.
+
+        @type window_name: string
+        """
+        if self._object_cache is not None:
+            self._info("invalidate object cache (%s)", window_name)
+            self._object_cache.invalidate(window_name)
+        self._invalidate_properties(window_name)
+        if self._locator is not None:
+            self._locator.invalidate()
+
+    def get_cache_statistics(self):
+        """
+        Get the hit rates of the caches of the library
+
+        Reports the object cache (object_cache_ttl), the property and state cache
+        (property_cache_ttl), the locator resolutions (resolve_locators) and the window
+        list (window_list_max_age), whichever are enabled, to help tuning their settings.
+
+        @return: dictionary mapping each enabled cache to a dictionary with its hits,
+        misses and hit_rate, plus size for the object and property caches and the number
+        of window list refreshes for the window list.
+        @rtype: dictionary
+
+        Examples:
+        | ${stats}= | Get Cache Statistics |
+        | Log | ${stats['property']['hit_rate']} |
+        """
+        statistics = {}
+        if self._object_cache is not None:
+            statistics['object'] = self._object_cache.statistics()
+        if self._property_cache is not None:
+            statistics['property'] = self._property_cache.statistics()
+        if self._locator is not None:
+            lookups = self._locator.hits + self._locator.misses
+            statistics['locator'] = {'hits': self._locator.hits, 'misses': self._locator.misses,
+                                     'hit_rate': float(self._locator.hits) / lookups if lookups else 0.0}
+        if self._window_registry is not None:
+            statistics['window_list'] = {'refreshes': self._window_registry.refreshes}
+        self._log_list(['%s: %s' % (name, ', '.join('%s %s' % item for item in sorted(stats.items())))
+                        for name, stats in sorted(statistics.items())], 'cache')
+        return statistics
+
+    # Private
+
+    @staticmethod
+    def _batch_call(keyword_name, args):
+        name = keyword_name.lower().replace(' ', '').replace('_', '')
+        if name not in _BATCH_CALLS:
+            raise LdtpExecutionError("'%s' can not be run in an ldtp batch." % keyword_name)
+        method, adapt = _BATCH_CALLS[name]
+        try:
+            return method, adapt(*args)
+        except (TypeError, ValueError) as err:
+            raise LdtpExecutionError("Invalid arguments for '%s' in an ldtp batch: %s" % (keyword_name, err))
+
+    def _fan_out(self, call, window_name, object_names):
+        # Only read-only calls go through here. They go straight to the
+        # client, keywords are not reentrant across threads.
+        from multiprocessing import TimeoutError
+        method = getattr(self._client, call)
+        if self._fanout_workers > 1 and len(object_names) > 1 and getattr(self._client, 'thread_safe', False):
+            if self._fanout_pool is None:
+                from multiprocessing.pool import ThreadPool
+                self._fanout_pool = ThreadPool(self._fanout_workers)
+            pending = [(name, self._fanout_pool.apply_async(method, (window_name, name)))
+                       for name in object_names]
+        else:
+            pending = [(name, _Called(method, window_name, name)) for name in object_names]
+        results = OrderedDict()
+        errors = []
+        timed_out = False
+        deadline = time.time() + self._fanout_timeout
+        for name, result in pending:
+            try:
+                results[name] = result.get(max(deadline - time.time(), 0))
+            except LdtpExecutionError as e:
+                errors.append('%s: %s' % (name, e))
+            except TimeoutError:
+                timed_out = True
+                errors.append('%s: no answer in %s seconds' % (name, self._fanout_timeout))
+        if timed_out and self._fanout_pool is not None:
+            # Workers stuck in the calls would hold up later fan-outs, the
+            # next one starts a new pool.
+            pool, self._fanout_pool = self._fanout_pool, None
+            pool.terminate()
+        if errors:
+            raise LdtpExecutionError("%s failed:\n%s" % (call, '\n'.join(errors)))
+        return results
+
+    def _close_fanout_pool(self):
+        if self._fanout_pool is not None:
+            pool, self._fanout_pool = self._fanout_pool, None
+            pool.close()
+            pool.join()
+
+    def _invalidate_properties(self, window_name=None):
+        # The cache holds the names resolve_locators resolved globs to.
+        if self._property_cache is None:
+            return
+        if window_name is None or is_glob(window_name):
+            self._property_cache.invalidate()
+        else:
+            self._property_cache.invalidate_where(lambda key: same_window(key[0], window_name))
+
+    def _gui_exist_now(self, window_name, object_name=''):
+        if self._object_cache is not None:
+            self._object_cache.invalidate(window_name)
+        self._invalidate_properties(window_name)
+        if self._window_registry is not None and not object_name:
+            # The poll re-reads the window list, which then keeps answering
+            # after the wait. Object polls do not use the list.
+            self._window_registry.invalidate()
+        return self._client.guiexist(window_name, object_name)
+
+    @staticmethod
+    def _gui_condition(condition):
+        if isinstance(condition, (list, tuple)):
+            return (list(condition) + ['', ''])[:3]
+        return condition, '', ''
+
+    def _gui_condition_met(self, window_name, object_name='', state=''):
+        return self._gui_exist_now(window_name, object_name) and \
+            (not object_name or not state or self._client.hasstate(window_name, object_name, state))
+
+    def _uses_ldtp_module(self):
+        # Walks down the client wrappers through their instance attributes,
+        # their __getattr__ would forward the lookup to the client.
+        client = self._client
+        while client is not ldtp:
+            attributes = getattr(client, '__dict__', {})
+            client = attributes.get('_client', attributes.get('client'))
+            if client is None:
+                return False
+        return True
+
+    def _wait_until(self, predicate, timeout):
+        if not self._watching_window_events and self._uses_ldtp_module():
+            # ldtp's own event thread reports window changes, let it cut
+            # the backoff short.
+            self._watching_window_events = True
+            try:
+                ldtp.registerevent('window:create', self._waiter.notify)
+                ldtp.registerevent('window:destroy', self._waiter.notify)
+            except LdtpExecutionError as e:
+                self._debug("window events not available: %s", e)
+        return self._waiter.wait_until(predicate, timeout)
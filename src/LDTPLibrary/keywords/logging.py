@@ -18,23 +18,50 @@ See 'LICENSE' in the source distribution for more information.
 import os
 from robot.api import logger
 from .keywordgroup import KeywordGroup
-from robot.libraries.BuiltIn import BuiltIn
+from ..utils.arguments import is_truthy
 
-try:
-    from robot.libraries.BuiltIn import RobotNotRunningError
-except ImportError:
-    RobotNotRunningError = AttributeError
+LOG_LEVELS = {'TRACE': 0, 'DEBUG': 10, 'INFO': 20, 'HTML': 20, 'WARN': 30, 'NONE': 100}
 
 
 class LoggingKeywords(KeywordGroup):
+    def __init__(self):
+        self._log_threshold = LOG_LEVELS['INFO']
+
+    # Public
+
+    def set_ldtp_log_level(self, level):
+        """Sets the level of the messages this library logs and returns the
+        previous level.
+
+        Valid levels are TRACE, DEBUG, INFO (default), WARN and NONE. Messages
+        below the level are neither formatted nor written to the log, which
+        keeps output.xml small in suites doing many GUI calls. Robot Framework's
+        own log level still applies on top of this one.
+
+        The initial level is set with the ``log_level`` import argument.
+
+        Example:
+        | ${old}= | Set LDTP Log Level | WARN |
+        | Click | frmCalculator | btn1 |
+        | Set LDTP Log Level | ${old} |
+        """
+        old_level = self._get_log_level_name()
+        self._set_log_level(level)
+        return old_level
+
     # Private
 
-    @staticmethod
-    def _debug(message):
-        logger.debug(message)
+    def _debug(self, message, *args):
+        if self._log_threshold <= LOG_LEVELS['DEBUG']:
+            self._emit('DEBUG', message % args if args else message)
 
     @staticmethod
     def _get_log_dir():
+        from robot.libraries.BuiltIn import BuiltIn
+        try:
+            from robot.libraries.BuiltIn import RobotNotRunningError
+        except ImportError:
+            RobotNotRunningError = AttributeError
         try:
             variables = BuiltIn().get_variables()
             logfile = variables['${LOG FILE}']
@@ -44,13 +71,13 @@ class LoggingKeywords(KeywordGroup):
         except RobotNotRunningError:
             return os.getcwd()
 
-    @staticmethod
-    def _html(message):
-        logger.info(message, True, False)
+    def _html(self, message, *args):
+        if self._log_threshold <= LOG_LEVELS['HTML']:
+            self._emit('HTML', message % args if args else message)
 
-    @staticmethod
-    def _info(message):
-        logger.info(message)
+    def _info(self, message, *args):
+        if self._log_threshold <= LOG_LEVELS['INFO']:
+            self._emit('INFO', message % args if args else message)
 
     def _log(self, message, level='INFO'):
         level = level.upper()
@@ -64,12 +91,57 @@ class LoggingKeywords(KeywordGroup):
             self._html(message)
 
     def _log_list(self, items, what='item'):
-        msg = ['Altogether %d %s%s.' % (len(items), what, ['s', ''][len(items) == 1])]
-        for index, item in enumerate(items):
-            msg.append('%d: %s' % (index + 1, item))
-        self._info('\n'.join(msg))
+        if self._log_threshold <= LOG_LEVELS['INFO']:
+            msg = ['Altogether %d %s%s.' % (len(items), what, ['s', ''][len(items) == 1])]
+            for index, item in enumerate(items):
+                msg.append('%d: %s' % (index + 1, item))
+            self._emit('INFO', '\n'.join(msg))
         return items
 
+    def _warn(self, message, *args):
+        if self._log_threshold <= LOG_LEVELS['WARN']:
+            self._emit('WARN', message % args if args else message)
+
+    def _emit(self, level, message):
+        state = self._keyword_state
+        if state.log_buffer is not None and state.depth:
+            state.log_buffer.append((level, message))
+        else:
+            self._write_log(level, message)
+
+    def _flush_log_buffer(self):
+        # Consecutive messages of the same level become one log message
+        buffer = self._keyword_state.log_buffer
+        messages = []
+        for level, message in buffer:
+            if messages and messages[-1][0] == level:
+                messages[-1][1].append(message)
+            else:
+                messages.append((level, [message]))
+        del buffer[:]
+        for level, lines in messages:
+            self._write_log(level, '\n'.join(lines))
+
+    def _get_log_level_name(self):
+        for name in ('TRACE', 'DEBUG', 'INFO', 'WARN', 'NONE'):
+            if LOG_LEVELS[name] == self._log_threshold:
+                return name
+
+    def _set_log_level(self, level, buffering=None):
+        level = str(level).strip().upper()
+        if level not in LOG_LEVELS or level == 'HTML':
+            raise ValueError("Invalid log level '%s', expected TRACE, DEBUG, INFO, WARN or NONE." % level)
+        self._log_threshold = LOG_LEVELS[level]
+        if buffering is not None:
+            self._keyword_state.log_buffer = [] if is_truthy(buffering) else None
+
     @staticmethod
-    def _warn(message):
-        logger.warn(message)
+    def _write_log(level, message):
+        if level == 'HTML':
+            logger.info(message, True, False)
+        elif level == 'WARN':
+            logger.warn(message)
+        elif level == 'DEBUG':
+            logger.debug(message)
+        else:
+            logger.info(message)
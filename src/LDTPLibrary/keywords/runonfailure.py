@@ -15,11 +15,8 @@ See http://ldtp.freedesktop.org/wiki/ for more information on LDTP.
 See 'LICENSE' in the source distribution for more information.
 """
 
-from robot.libraries import BuiltIn
 from .keywordgroup import KeywordGroup
 
-BUILTIN = BuiltIn.BuiltIn()
-
 
 class RunOnFailureKeywords(KeywordGroup):
     def __init__(self):
@@ -45,7 +42,7 @@ class RunOnFailureKeywords(KeywordGroup):
 
         self._run_on_failure_keyword = new_keyword
         self._run_on_failure_keyword_args = args
-        self._info('%s will be run on failure.' % new_keyword_text)
+        self._info('%s will be run on failure.', new_keyword_text)
 
         return old_keyword_text
 
@@ -58,7 +55,8 @@ class RunOnFailureKeywords(KeywordGroup):
             return
         self._running_on_failure_routine = True
         try:
-            BUILTIN.run_keyword(self._run_on_failure_keyword, *self._run_on_failure_keyword_args)
+            from robot.libraries.BuiltIn import BuiltIn
+            BuiltIn().run_keyword(self._run_on_failure_keyword, *self._run_on_failure_keyword_args)
         except Exception as err:
             self._run_on_failure_error(err)
         finally:
@@ -2,9 +2,19 @@
 # -*- coding: utf-8 -*-
 
 #from .events import events
+from .arguments import is_truthy
 from .librarylistener import LibraryListener
+from .client import LdtpClient
+from .cache import CachedClient, LRUCache
+from .session import LDTPSession, LDTPSessionPool
 
 
 __all__ = [
+    "is_truthy",
     "LibraryListener",
+    "LdtpClient",
+    "CachedClient",
+    "LRUCache",
+    "LDTPSession",
+    "LDTPSessionPool",
 ]
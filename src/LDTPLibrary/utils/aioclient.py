@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""asyncio LDTP client, Python 3.5 or newer only.
+
+Nothing in the library imports this module, so it does not slow down the
+library import, and setup.py does not install it before Python 3.5.
+"""
+import os
+import time
+import asyncio
+import tempfile
+from six.moves import xmlrpc_client
+from six.moves.urllib.parse import urlparse
+from .client import write_image
+from .lazy import LdtpExecutionError
+
+__all__ = [
+    "AsyncLdtpClient",
+]
+
+
+class _Connection(object):
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.time()
+
+    def close(self):
+        self.writer.close()
+
+
+class _AsyncRemoteMethod(object):
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+
+    def __call__(self, *args):
+        return self._client.call(self._name, *args)
+
+
+class AsyncLdtpClient(object):
+    """Non-blocking counterpart of `LdtpClient`.
+
+    Exposes the same calls as the ``ldtp`` module as coroutines, e.g.
+    ``await client.click(window_name, object_name)``. Every call in flight
+    uses its own HTTP connection, up to ``pool_size`` idle connections are
+    kept open and reused by later calls for ``idle_timeout`` seconds, so
+    one event loop can overlap calls to one or several ldtpd. ldtpd
+    answers concurrent calls only as far as it runs them concurrently.
+    """
+
+    def __init__(self, address=None, port=None, pool_size=4, idle_timeout=30):
+        address = address or os.environ.get('LDTP_SERVER_ADDR', 'localhost')
+        port = port or os.environ.get('LDTP_SERVER_PORT', '4118')
+        self.uri = 'http://%s:%s/RPC2' % (address, port)
+        self.pool_size = int(pool_size)
+        self.idle_timeout = float(idle_timeout)
+        url = urlparse(self.uri)
+        self._host, self._port, self._path = url.hostname, url.port, url.path
+        self._idle = []
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = _AsyncRemoteMethod(self, name)
+        setattr(self, name, method)
+        return method
+
+    async def call(self, name, *args):
+        """Calls the ldtpd method ``name`` and returns its result, raising
+        LdtpExecutionError when ldtpd reports an error."""
+        body = xmlrpc_client.dumps(tuple(args), name, allow_none=True)
+        response = await self._request(body.encode('utf-8', 'xmlcharrefreplace'))
+        try:
+            return xmlrpc_client.loads(response)[0][0]
+        except xmlrpc_client.Fault as e:
+            raise LdtpExecutionError(e.faultString)
+
+    async def batch(self, calls):
+        """Runs ``calls``, a list of ``(method_name, args)`` pairs,
+        concurrently. Returns ``(result, error)`` pairs in call order like
+        `LdtpClient.batch`."""
+        return await asyncio.gather(*[self._outcome(name, args) for name, args in calls])
+
+    async def imagecapture(self, window_name=None, out_file=None, x=0, y=0,
+                           width=None, height=None):
+        if not out_file:
+            out_file = tempfile.mktemp('.png', 'ldtp_')
+        else:
+            out_file = os.path.expanduser(out_file)
+        write_image(out_file, await self.imagecapture_data(window_name, x, y, width, height))
+        return out_file
+
+    async def imagecapture_data(self, window_name=None, x=0, y=0, width=None, height=None):
+        return await self.call('imagecapture', window_name, x, y, width, height)
+
+    def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    # Private
+
+    async def _outcome(self, name, args):
+        try:
+            return await self.call(name, *args), None
+        except LdtpExecutionError as e:
+            return None, str(e)
+
+    async def _request(self, body):
+        while True:
+            connection, reused = await self._checkout()
+            try:
+                return await self._exchange(connection, body)
+            except (OSError, asyncio.IncompleteReadError):
+                connection.close()
+                # ldtpd may have dropped a keep-alive connection while it
+                # was idle in the pool, retry once on a fresh one.
+                if not reused:
+                    raise
+
+    async def _exchange(self, connection, body):
+        head = ('POST %s HTTP/1.1\r\nHost: %s:%s\r\nUser-Agent: LDTPLibrary\r\n'
+                'Content-Type: text/xml\r\nContent-Length: %d\r\n\r\n'
+                % (self._path, self._host, self._port, len(body)))
+        connection.writer.write(head.encode('ascii') + body)
+        await connection.writer.drain()
+        status_line = await connection.reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        headers = {}
+        while True:
+            line = await connection.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        keep_alive = headers.get('connection', '').lower() != 'close' if version == 'HTTP/1.1' \
+            else headers.get('connection', '').lower() == 'keep-alive'
+        transfer_encoding = headers.get('transfer-encoding', 'identity').lower()
+        if transfer_encoding == 'chunked':
+            response = await self._read_chunked(connection.reader)
+        elif transfer_encoding != 'identity':
+            connection.close()
+            raise xmlrpc_client.ProtocolError(self.uri, int(status),
+                                              'Unsupported transfer encoding %s' % transfer_encoding, headers)
+        elif 'content-length' in headers:
+            response = await connection.reader.readexactly(int(headers['content-length']))
+        else:
+            response = await connection.reader.read()
+            keep_alive = False
+        if keep_alive:
+            self._checkin(connection)
+        else:
+            connection.close()
+        if status != '200':
+            raise xmlrpc_client.ProtocolError(self.uri, int(status), reason, headers)
+        return response
+
+    @staticmethod
+    async def _read_chunked(reader):
+        chunks = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise asyncio.IncompleteReadError(b''.join(chunks), None)
+            size = int(line.split(b';', 1)[0].strip(), 16)
+            if not size:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        # Trailers, if any, end with an empty line like the headers.
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        return b''.join(chunks)
+
+    async def _checkout(self):
+        now = time.time()
+        while self._idle:
+            connection = self._idle.pop()
+            if now - connection.last_used <= self.idle_timeout:
+                return connection, True
+            connection.close()
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        return _Connection(reader, writer), False
+
+    def _checkin(self, connection):
+        if len(self._idle) < self.pool_size:
+            connection.last_used = time.time()
+            self._idle.append(connection)
+        else:
+            connection.close()
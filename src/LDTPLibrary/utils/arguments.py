@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__all__ = [
+    "is_truthy",
+]
+
+_FALSE_STRINGS = ('', 'false', 'no', 'off', 'none', '0')
+
+
+def is_truthy(value):
+    """Whether an import or keyword argument, usually a string from the
+    test data, enables an option."""
+    return str(value).strip().lower() not in _FALSE_STRINGS
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+import itertools
+import threading
+import six
+from .client import run_batch
+from .lazy import LdtpExecutionError
+from .locator import is_glob, same_window
+
+__all__ = [
+    "CachedClient",
+    "LRUCache",
+    "PropertyClient",
+    "changed_window",
+]
+
+_READ_ONLY_PREFIXES = ('get', 'verify', 'has', 'does', 'list')
+_READ_ONLY_CALLS = frozenset(['guiexist', 'objectexist', 'stateenabled',
+                              'menuitemenabled', 'imagecapture', 'imagecapture_data'])
+# Calls changing the UI whose first argument is the window they act on.
+# enterstring only has one when it is given an object as well.
+_WINDOW_CALLS = frozenset(['activatewindow', 'appendtext', 'check', 'checkrow', 'click', 'closewindow',
+                           'comboselect', 'comboselectindex', 'copytext', 'cuttext', 'decrease',
+                           'deletetext', 'doubleclick', 'doubleclickrow', 'doubleclickrowindex',
+                           'enterstring', 'expandtablecell', 'expendtablecell', 'grabfocus', 'increase',
+                           'inserttext', 'invokemenu', 'maximizewindow', 'menucheck', 'menuuncheck',
+                           'minimizewindow', 'mouseleftclick', 'mousemove', 'mouserightclick',
+                           'multiremove', 'multiselect', 'onedown', 'oneleft', 'oneright', 'oneup',
+                           'pastetext', 'press', 'remap', 'rightclick', 'scrolldown', 'scrollleft',
+                           'scrollright', 'scrollup', 'selectall', 'selectindex', 'selectitem',
+                           'selectlastrow', 'selectmenuitem', 'selectpanel', 'selectpanelname',
+                           'selectrow', 'selectrowindex', 'selectrowpartialmatch', 'selecttab',
+                           'selecttabindex', 'setcellvalue', 'setmax', 'setmin', 'settextvalue',
+                           'setvalue', 'singleclickrow', 'uncheck', 'uncheckrow', 'unmaximizewindow',
+                           'unminimizewindow', 'unselectall', 'unselectindex', 'unselectitem'])
+
+
+def is_read_only(name):
+    """Tells whether the ldtp call ``name`` only reads the UI."""
+    return name in _READ_ONLY_CALLS or name.startswith(_READ_ONLY_PREFIXES)
+
+
+def changed_window(name, args):
+    """Returns the plain window name the ldtp call ``name`` with ``args``
+    may have changed, or None when it may have changed any window."""
+    window_name = args[0] if args and name in _WINDOW_CALLS else None
+    if name == 'enterstring' and not (len(args) > 1 and args[1]):
+        return None
+    if not isinstance(window_name, six.string_types) or is_glob(window_name):
+        return None
+    return window_name
+
+
+class LRUCache(object):
+    """Least recently used cache whose entries expire ``ttl`` seconds after
+    they were stored. At most ``max_size`` keys are kept.
+    """
+
+    def __init__(self, ttl=5, max_size=32):
+        self.ttl = float(ttl)
+        self.max_size = int(max_size)
+        self.hits = 0
+        self.misses = 0
+        # key -> [value, stored at, use tick], without OrderedDict, which
+        # Python 2.6 does not have.
+        self._entries = {}
+        self._ticks = itertools.count()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._live(key)
+            self._count(value is not None)
+            return default if value is None else value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = [value, time.time(), next(self._ticks)]
+            while len(self._entries) > self.max_size:
+                del self._entries[min(self._entries, key=lambda k: self._entries[k][2])]
+
+    def setdefault(self, key, factory):
+        """Returns the live value of ``key``, storing ``factory()`` first if
+        there is none. Used for containers of cached values, so it counts
+        neither a hit nor a miss, see `count`."""
+        with self._lock:
+            value = self._live(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def count(self, hit):
+        """Counts a lookup of a value kept inside an entry as a hit or a miss."""
+        with self._lock:
+            self._count(hit)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Drops the entries whose key ``predicate`` is true for."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def statistics(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0}
+
+    # Private
+
+    def _live(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > self.ttl:
+            del self._entries[key]
+            return None
+        entry[2] = next(self._ticks)
+        return entry[0]
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+
+class CachedClient(object):
+    """Wraps an LDTP client and answers object list and existence queries
+    for recently seen windows from ``cache``, an `LRUCache` keyed by window
+    name. Any call not known to be read-only, such as ``click``, ``remap``,
+    ``closewindow`` or ``launchapp``, drops the whole cache since it may
+    have changed any window on the desktop.
+    """
+
+    def __init__(self, client, cache):
+        self._client = client
+        self._cache = cache
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr) or is_read_only(name):
+            return attr
+
+        def call(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._cache.invalidate()
+        return call
+
+    def getobjectlist(self, window_name):
+        return list(self._cached(window_name, 'objects', lambda: self._client.getobjectlist(window_name)))
+
+    def objectexist(self, window_name, object_name):
+        return self._exist('objectexist', window_name, object_name)
+
+    def guiexist(self, window_name, object_name=''):
+        return self._exist('guiexist', window_name, object_name)
+
+    def doesmenuitemexist(self, window_name, object_name, strict_hierarchy=False):
+        return self._cached(window_name, ('menu', object_name, strict_hierarchy),
+                            lambda: self._client.doesmenuitemexist(window_name, object_name, strict_hierarchy))
+
+    def batch(self, calls):
+        try:
+            return run_batch(self._client, calls)
+        finally:
+            if not all(is_read_only(name) for name, _ in calls):
+                self._cache.invalidate()
+
+    def close(self):
+        close = getattr(self._client, 'close', None)
+        if close is not None:
+            close()
+
+    # Private
+
+    def _cached(self, window_name, key, fetch):
+        window = self._cache.setdefault(window_name, dict)
+        hit = key in window
+        self._cache.count(hit)
+        if not hit:
+            window[key] = fetch()
+        return window[key]
+
+    def _exist(self, call, window_name, object_name):
+        if object_name and object_name in self._cache.setdefault(window_name, dict).get('objects', ()):
+            self._cache.count(True)
+            return 1
+        return self._cached(window_name, ('exist', object_name),
+                            lambda: getattr(self._client, call)(window_name, object_name))
+
+
+class PropertyClient(object):
+    """Wraps an LDTP client and answers ``getobjectproperty``,
+    ``getallstates`` and immediate ``hasstate`` calls from ``cache``, an
+    `LRUCache` keyed by ``(window, object, property)``, the states being
+    kept under the ``states`` property.
+
+    A call not known to be read-only drops the entries of the window it
+    was made on, under any name ldtp takes for it, see `same_window`, or
+    all entries when it does not act on one window given by its plain
+    name, e.g. ``launchapp``, ``generatekeyevent`` or a call on a glob.
+    """
+
+    def __init__(self, client, cache):
+        self._client = client
+        self._cache = cache
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr) or is_read_only(name):
+            return attr
+
+        def call(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._invalidate(name, args)
+        return call
+
+    def getobjectproperty(self, window_name, object_name, prop):
+        return self._cached((window_name, object_name, prop),
+                            lambda: self._client.getobjectproperty(window_name, object_name, prop))
+
+    def getallstates(self, window_name, object_name):
+        return list(self._cached((window_name, object_name, 'states'),
+                                 lambda: self._client.getallstates(window_name, object_name)))
+
+    def hasstate(self, window_name, object_name, state, guiTimeOut=0):
+        if guiTimeOut:
+            return self._client.hasstate(window_name, object_name, state, guiTimeOut)
+        try:
+            return int(state in self.getallstates(window_name, object_name))
+        except LdtpExecutionError:
+            # ldtpd answers 0 for an object it cannot find.
+            return 0
+
+    def batch(self, calls):
+        try:
+            return run_batch(self._client, calls)
+        finally:
+            for name, args in calls:
+                if not is_read_only(name):
+                    self._invalidate(name, args)
+
+    def close(self):
+        close = getattr(self._client, 'close', None)
+        if close is not None:
+            close()
+
+    # Private
+
+    def _cached(self, key, fetch):
+        value = self._cache.get(key)
+        if value is None:
+            value = fetch()
+            self._cache.set(key, value)
+        return value
+
+    def _invalidate(self, name, args):
+        window_name = changed_window(name, args)
+        if window_name is None:
+            self._cache.invalidate()
+        else:
+            self._cache.invalidate_where(lambda key: same_window(key[0], window_name))
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import time
+import base64
+import socket
+import tempfile
+import threading
+from six.moves import http_client, xmlrpc_client
+from six.moves.urllib.parse import urlparse
+from .lazy import LdtpExecutionError
+
+__all__ = [
+    "LdtpClient",
+    "PooledTransport",
+    "run_batch",
+    "write_image",
+]
+
+
+def run_batch(client, calls):
+    """Runs ``calls``, a list of ``(method_name, args)`` pairs, on ``client``.
+
+    Uses `LdtpClient.batch` when the client has it and plain calls one by
+    one otherwise, e.g. with the module level ``ldtp`` client. Returns
+    ``(result, error)`` pairs in call order.
+    """
+    if hasattr(client, 'batch'):
+        return client.batch(calls)
+    outcomes = []
+    for name, args in calls:
+        try:
+            outcomes.append((getattr(client, name)(*args), None))
+        except LdtpExecutionError as e:
+            outcomes.append((None, str(e)))
+    return outcomes
+
+
+def write_image(path, data):
+    """Writes ``data``, a base64 encoded image as returned by ldtpd, to ``path``."""
+    with open(path, 'wb') as f:
+        f.write(base64.b64decode(data))
+
+
+class PooledTransport(xmlrpc_client.Transport):
+    """XML-RPC transport keeping persistent HTTP/1.1 connections to ldtpd.
+
+    Up to ``pool_size`` idle connections are kept open and reused by later
+    requests. Connections left idle for more than ``idle_timeout`` seconds
+    are closed instead of being reused. Connecting to ldtpd and every read
+    of a response give up after ``timeout`` seconds, ``None`` waits forever.
+    """
+
+    def __init__(self, pool_size=4, idle_timeout=30, timeout=None):
+        xmlrpc_client.Transport.__init__(self)
+        self.pool_size = int(pool_size)
+        self.idle_timeout = float(idle_timeout)
+        self.timeout = float(timeout) if timeout else None
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def request(self, host, handler, request_body, verbose=0):
+        self.verbose = verbose
+        if not isinstance(request_body, bytes):
+            request_body = request_body.encode('utf-8')
+        while True:
+            connection, reused = self._checkout(host)
+            try:
+                return self._single_request(connection, host, handler, request_body)
+            except socket.timeout:
+                # ldtpd may still be running the call, never send it twice.
+                connection.close()
+                raise
+            except (socket.error, http_client.HTTPException):
+                connection.close()
+                # ldtpd may have dropped a keep-alive connection while it
+                # was idle in the pool, retry once on a fresh one.
+                if not reused:
+                    raise
+
+    def pipeline(self, host, handler, request_bodies):
+        """Sends all ``request_bodies`` on one connection before reading any
+        response, so the whole sequence costs a single round trip.
+
+        Returns ``(result, error)`` pairs in request order. The list is
+        shorter than ``request_bodies`` if ldtpd closed the connection
+        before answering every request.
+        """
+        self.verbose = 0
+        connection, _ = self._checkout(host)
+        if connection.sock is None:
+            connection.connect()
+        chost = self.get_host_info(host)[0]
+        requests = []
+        for body in request_bodies:
+            head = ('POST %s HTTP/1.1\r\nHost: %s\r\nUser-Agent: %s\r\n'
+                    'Content-Type: text/xml\r\nContent-Length: %d\r\n\r\n'
+                    % (handler, chost, self.user_agent, len(body)))
+            requests.append(head.encode('ascii') + body)
+        results = []
+        reader = _SharedReader(connection.sock.makefile('rb'))
+        # Responses are read while the requests are still being written,
+        # otherwise both sides can block on full socket buffers.
+        writer = threading.Thread(target=self._send_all, args=(connection.sock, b''.join(requests)))
+        writer.daemon = True
+        try:
+            writer.start()
+            for _ in request_bodies:
+                response = http_client.HTTPResponse(reader, method='POST')
+                response.begin()
+                if response.status != 200:
+                    raise xmlrpc_client.ProtocolError(host + handler, response.status,
+                                                      response.reason, response.msg)
+                try:
+                    results.append((self.parse_response(response)[0], None))
+                except xmlrpc_client.Fault as e:
+                    results.append((None, e.faultString))
+                if response.will_close:
+                    break
+        except socket.timeout:
+            connection.close()
+            raise
+        except (socket.error, http_client.HTTPException):
+            connection.close()
+            return results
+        except xmlrpc_client.ProtocolError:
+            connection.close()
+            raise
+        finally:
+            writer.join()
+            reader.release()
+        if len(results) < len(request_bodies):
+            connection.close()
+        else:
+            self._checkin(host, connection)
+        return results
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, connection, _ in idle:
+            connection.close()
+
+    # Private
+
+    def _single_request(self, connection, host, handler, request_body):
+        connection.putrequest('POST', handler, skip_accept_encoding=True)
+        connection.putheader('User-Agent', self.user_agent)
+        connection.putheader('Content-Type', 'text/xml')
+        connection.putheader('Content-Length', str(len(request_body)))
+        connection.endheaders(request_body)
+        response = connection.getresponse()
+        if response.status != 200:
+            response.read()
+            connection.close()
+            raise xmlrpc_client.ProtocolError(host + handler, response.status,
+                                              response.reason, response.msg)
+        result = self.parse_response(response)
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(host, connection)
+        return result
+
+    @staticmethod
+    def _send_all(sock, data):
+        try:
+            sock.sendall(data)
+        except socket.error:
+            # Surfaces on the reading side as a short or broken response.
+            pass
+
+    def _checkout(self, host):
+        now = time.time()
+        with self._lock:
+            while self._idle:
+                idle_host, connection, last_used = self._idle.pop()
+                if idle_host == host and now - last_used <= self.idle_timeout:
+                    return connection, True
+                connection.close()
+        chost = self.get_host_info(host)[0]
+        if self.timeout is None:
+            return http_client.HTTPConnection(chost), False
+        return http_client.HTTPConnection(chost, timeout=self.timeout), False
+
+    def _checkin(self, host, connection):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((host, connection, time.time()))
+                return
+        connection.close()
+
+
+class _SharedReader(object):
+    """Stands in for the socket of pipelined responses, so that each
+    response reads from the same buffered file and leaves it open."""
+
+    def __init__(self, fp):
+        self._fp = fp
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+    def makefile(self, *args, **kwargs):
+        return self
+
+    def close(self):
+        pass
+
+    def release(self):
+        self._fp.close()
+
+
+class _RemoteMethod(object):
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+
+    def __call__(self, *args):
+        try:
+            return getattr(self._client._proxy, self._name)(*args)
+        except xmlrpc_client.Fault as e:
+            raise LdtpExecutionError(e.faultString)
+
+
+class LdtpClient(object):
+    """LDTP client owned by a library instance.
+
+    Exposes the same calls as the module level ``ldtp`` client, e.g.
+    ``client.click(window_name, object_name)``, but sends them over a
+    `PooledTransport` so consecutive keywords share HTTP connections.
+    The ldtpd endpoint defaults to the ``LDTP_SERVER_ADDR`` and
+    ``LDTP_SERVER_PORT`` environment variables, like the ``ldtp`` module.
+    Unlike the ``ldtp`` module it can be called from several threads, and
+    it does not start ldtpd when nothing listens on the endpoint. A call
+    that gets no answer within ``timeout`` seconds raises socket.timeout.
+    """
+
+    thread_safe = True
+
+    def __init__(self, address=None, port=None, pool_size=4, idle_timeout=30, timeout=120):
+        address = address or os.environ.get('LDTP_SERVER_ADDR', 'localhost')
+        port = port or os.environ.get('LDTP_SERVER_PORT', '4118')
+        self.uri = 'http://%s:%s/RPC2' % (address, port)
+        self._multicall = None
+        self._transport = PooledTransport(pool_size, idle_timeout, timeout)
+        self._proxy = xmlrpc_client.ServerProxy(self.uri, self._transport,
+                                                allow_none=True)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = _RemoteMethod(self, name)
+        setattr(self, name, method)
+        return method
+
+    def imagecapture(self, window_name=None, out_file=None, x=0, y=0,
+                     width=None, height=None):
+        if not out_file:
+            out_file = tempfile.mktemp('.png', 'ldtp_')
+        else:
+            out_file = os.path.expanduser(out_file)
+        write_image(out_file, self.imagecapture_data(window_name, x, y, width, height))
+        return out_file
+
+    def imagecapture_data(self, window_name=None, x=0, y=0, width=None, height=None):
+        """Returns the base64 encoded PNG captured by ldtpd without
+        writing it anywhere."""
+        return _RemoteMethod(self, 'imagecapture')(window_name, x, y, width, height)
+
+    def batch(self, calls):
+        """Runs ``calls``, a list of ``(method_name, args)`` pairs, in one round trip.
+
+        Uses ``system.multicall`` when ldtpd supports it and HTTP pipelining
+        over a single pooled connection otherwise. Returns ``(result, error)``
+        pairs in call order, ``error`` being ``None`` on success.
+        """
+        if not calls:
+            return []
+        if self._multicall is not False:
+            try:
+                results = self._proxy.system.multicall(
+                        [{'methodName': name, 'params': list(args)} for name, args in calls])
+            except (xmlrpc_client.Fault, xmlrpc_client.ProtocolError):
+                self._multicall = False
+            else:
+                self._multicall = True
+                return [(None, r['faultString']) if isinstance(r, dict) else (r[0], None)
+                        for r in results]
+        url = urlparse(self.uri)
+        bodies = []
+        for name, args in calls:
+            body = xmlrpc_client.dumps(tuple(args), name, allow_none=True)
+            if not isinstance(body, bytes):
+                body = body.encode('utf-8', 'xmlcharrefreplace')
+            bodies.append(body)
+        results = self._transport.pipeline(url.netloc, url.path, bodies)
+        # Anything ldtpd did not answer before closing the connection
+        # is sent again one call at a time.
+        for name, args in calls[len(results):]:
+            try:
+                results.append((getattr(self, name)(*args), None))
+            except LdtpExecutionError as e:
+                results.append((None, str(e)))
+        return results
+
+    def close(self):
+        self._transport.close()
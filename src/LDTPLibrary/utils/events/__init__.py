@@ -1,7 +1,9 @@
 from .scope_event import ScopeStart, ScopeEnd
+from .suite_event import SuiteEnd
 
-_registered_events = [ScopeStart, ScopeEnd]
-_events = []
+_registered_events = dict((event.name, event) for event in (ScopeStart, ScopeEnd, SuiteEnd))
+# event name -> event key, e.g. the scope, -> handlers
+_handlers = {}
 
 __all__ = [
     "on",
@@ -11,20 +13,36 @@ __all__ = [
 
 
 def on(event_name, *args, **kwargs):
-    for event in _registered_events:
-        if event.name == event_name:
-            _events.append(event(*args, **kwargs))
-            return
+    event = _registered_events.get(event_name)
+    if event is None:
+        return
+    handler = event(*args, **kwargs)
+    _handlers.setdefault(event_name, {}).setdefault(handler.key, []).append(handler)
 
 
 def dispatch(event_name, *args, **kwargs):
-    for event in _events:
-        if event.name == event_name:
-            event.trigger(*args, **kwargs)
+    handlers_by_key = _handlers.get(event_name)
+    if not handlers_by_key:
+        return
+    keys = [None]
+    if args and args[0] is not None:
+        keys.append(args[0])
+    for key in keys:
+        handlers = handlers_by_key.get(key)
+        if not handlers:
+            continue
+        # One-shot handlers are dropped before they run, so the handlers can
+        # register new ones for the same key.
+        remaining = [handler for handler in handlers if not handler.one_shot]
+        if remaining:
+            handlers_by_key[key] = remaining
+        else:
+            del handlers_by_key[key]
+        for handler in handlers:
+            handler.trigger(*args, **kwargs)
 
 
 def register_event(event):
-    for registered_event in _registered_events:
-        if event.name == registered_event.name:
-            raise AttributeError("An event with the name " + event.name + " already exists.")
-    _registered_events.append(event)
+    if event.name in _registered_events:
+        raise AttributeError("An event with the name " + event.name + " already exists.")
+    _registered_events[event.name] = event
@@ -4,6 +4,12 @@ import abc
 
 
 class Event(object):
+    # Handlers are looked up by ``key``, the first dispatch argument, or
+    # called on every dispatch when it is None. ``one_shot`` handlers are
+    # removed after they have been called once.
+    key = None
+    one_shot = False
+
     @abc.abstractmethod
     def trigger(self, *args, **kwargs):
         pass
@@ -1,8 +1,10 @@
 from .event import Event
-from robot.libraries.BuiltIn import BuiltIn
 
 
 class ScopeEvent(Event):
+    # A scope, i.e. a suite or test, starts and ends only once
+    one_shot = True
+
     def __init__(self, scope, action, *args, **kwargs):
         self.scope = scope
         self.action = action
@@ -10,10 +12,15 @@ class ScopeEvent(Event):
         self.action_kwargs = kwargs
 
         if scope == 'current':
+            from robot.libraries.BuiltIn import BuiltIn
             suite = BuiltIn().get_variable_value('${SUITE NAME}')
             test = BuiltIn().get_variable_value('${TEST NAME}', '')
             self.scope = suite + '.' + test if test != '' else suite
 
+    @property
+    def key(self):
+        return self.scope
+
     def trigger(self, *args, **kwargs):
         if args[0] == self.scope:
             self.action(*self.action_args, **self.action_kwargs)
@@ -0,0 +1,13 @@
+from .event import Event
+
+
+class SuiteEnd(Event):
+    name = 'suite_end'
+
+    def __init__(self, action, *args, **kwargs):
+        self.action = action
+        self.action_args = args
+        self.action_kwargs = kwargs
+
+    def trigger(self, *args, **kwargs):
+        self.action(*self.action_args, **self.action_kwargs)
@@ -0,0 +1,726 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Stand-in ldtpd for hermetic tests and benchmarks.
+
+Serves the ldtpd XML-RPC calls used by LDTPLibrary against an in-memory
+widget tree, so suites and benchmarks run on a headless box without a
+desktop, at-spi or ldtpd. Every call can be delayed to model the latency
+of a real desktop.
+
+Usage: python -m LDTPLibrary.utils.fakeldtpd [--port 4118] [--latency 0.002] [--tree tree.json]
+"""
+
+import copy
+import json
+import time
+import fnmatch
+import threading
+from six.moves import socketserver
+from six.moves.xmlrpc_server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+__all__ = [
+    "CALCULATOR",
+    "FakeDesktop",
+    "FakeLdtpServer",
+]
+
+# 1x1 transparent PNG
+_PNG = 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+_DEFAULT_STATES = ['enabled', 'sensitive', 'showing', 'visible']
+
+CALCULATOR = {
+    'frmCalculator': dict(
+        [('btn%d' % digit, {'role': 'push_button', 'label': str(digit)}) for digit in range(10)] +
+        [('btnAdd', {'role': 'push_button', 'label': '+'}),
+         ('btnSubtract', {'role': 'push_button', 'label': '-'}),
+         ('btnEquals', {'role': 'push_button', 'label': '='}),
+         ('btnClear', {'role': 'push_button', 'label': 'C'}),
+         ('txtResult', {'role': 'text', 'text': '0'}),
+         ('mnuApplication', {'role': 'menu', 'children': ['mnuPreferences', 'mnuQuit']}),
+         ('mnuPreferences', {'role': 'menu_item', 'opens': 'dlgPreferences'}),
+         ('mnuQuit', {'role': 'menu_item', 'closes': True}),
+         ('chkThousandsSeparator', {'role': 'check_box', 'states': _DEFAULT_STATES + ['checkable']}),
+         ('cboMode', {'role': 'combo_box', 'items': ['Basic', 'Advanced', 'Financial', 'Programming'],
+                      'text': 'Basic'}),
+         ('ptabMode', {'role': 'page_tab_list', 'items': ['Basic', 'Advanced']}),
+         ('sbrPrecision', {'role': 'spin_button', 'value': 9}),
+         ('tblHistory', {'role': 'table',
+                         'rows': [['%d+%d' % (row, row), str(row * 2)] for row in range(100)]})]),
+    'dlgPreferences': {
+        'btnClose': {'role': 'push_button', 'label': 'Close', 'closes': True},
+        'cboAngleunits': {'role': 'combo_box', 'items': ['Degrees', 'Radians', 'Gradians'],
+                          'text': 'Degrees'},
+    },
+}
+
+
+class _Widget(object):
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.role = spec.get('role', 'push_button')
+        self.label = spec.get('label', name)
+        self.text = spec.get('text', '')
+        self.value = float(spec.get('value', 0))
+        self.items = list(spec.get('items', []))
+        self.rows = [list(row) for row in spec.get('rows', [])]
+        self.checked_rows = set()
+        self.selected_rows = set()
+        self.children = list(spec.get('children', []))
+        self.states = set(spec.get('states', _DEFAULT_STATES))
+        self.opens = spec.get('opens')
+        self.closes = spec.get('closes', False)
+        self.size = list(spec.get('size', [0, 0, 80, 30]))
+
+
+class _Window(object):
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.size = list(spec.get('_size', [0, 0, 640, 480]))
+        self.states = set(_DEFAULT_STATES + ['active'])
+        self.objects = dict((object_name, _Widget(object_name, object_spec))
+                            for object_name, object_spec in spec.items() if not object_name.startswith('_'))
+
+
+class FakeDesktop(object):
+    """In-memory desktop exposing the ldtpd calls.
+
+    ``windows`` maps window names to their objects, each object being a
+    dictionary with a ``role`` and optionally ``label``, ``text``,
+    ``value``, ``items``, ``rows``, ``states``, ``children``, ``opens`` (a
+    window shown when it is clicked) and ``closes`` (closes its window when
+    clicked). Windows in ``windows`` exist from the start, the windows of
+    ``apps`` appear ``launch_delay`` seconds after `launchapp` of the app.
+    Window and object names may be given as glob patterns, like with ldtp.
+    """
+
+    def __init__(self, windows=None, apps=None, launch_delay=0.0, templates=None):
+        self.apps = dict(apps if apps is not None else {'gnome-calculator': ['frmCalculator']})
+        self.templates = copy.deepcopy(templates if templates is not None else CALCULATOR)
+        self.launch_delay = float(launch_delay)
+        self._windows = {}
+        self._pending = []
+        self._lock = threading.RLock()
+        self._next_pid = 1000
+        for name, spec in (windows or {}).items():
+            self.templates.setdefault(name, spec)
+            self._windows[name] = _Window(name, spec)
+
+    # Windows and objects
+
+    def launchapp(self, cmd, args=None, delay=0, env=1, lang='C'):
+        with self._lock:
+            windows = self.apps.get(cmd)
+            if windows is None:
+                raise LookupError('Unable to launch %s' % cmd)
+            for window_name in windows:
+                self._pending.append((time.time() + self.launch_delay, window_name))
+            self._next_pid += 1
+            return self._next_pid
+
+    def show_window(self, window_name):
+        """Opens window ``window_name`` of the templates immediately."""
+        with self._lock:
+            self._windows[window_name] = _Window(window_name, self.templates.get(window_name, {}))
+            return 1
+
+    def getwindowlist(self):
+        with self._lock:
+            return sorted(self._live_windows())
+
+    def getobjectlist(self, window_name):
+        return sorted(self._window(window_name).objects)
+
+    def guiexist(self, window_name, object_name=''):
+        try:
+            self._find(window_name, object_name)
+        except LookupError:
+            return 0
+        return 1
+
+    def objectexist(self, window_name, object_name):
+        return self.guiexist(window_name, object_name)
+
+    def waittillguiexist(self, window_name, object_name='', guiTimeOut=30, state=''):
+        return self._wait(lambda: self._exists_with_state(window_name, object_name, state), guiTimeOut)
+
+    def waittillguinotexist(self, window_name, object_name='', guiTimeOut=30, state=''):
+        return self._wait(lambda: not self._exists_with_state(window_name, object_name, state), guiTimeOut)
+
+    def wait(self, timeout=5):
+        time.sleep(float(timeout))
+        return 1
+
+    def remap(self, window_name):
+        self._window(window_name)
+        return 1
+
+    def activatewindow(self, window_name):
+        self._window(window_name)
+        return 1
+
+    def closewindow(self, window_name):
+        window = self._window(window_name)
+        with self._lock:
+            del self._windows[window.name]
+        return 1
+
+    def maximizewindow(self, window_name):
+        return self._set_window_state(window_name, 'maximized', True)
+
+    def unmaximizewindow(self, window_name):
+        return self._set_window_state(window_name, 'maximized', False)
+
+    def minimizewindow(self, window_name):
+        return self._set_window_state(window_name, 'iconified', True)
+
+    def unminimizewindow(self, window_name):
+        return self._set_window_state(window_name, 'iconified', False)
+
+    def getwindowsize(self, window_name):
+        return list(self._window(window_name).size)
+
+    def getobjectsize(self, window_name, object_name):
+        return list(self._find(window_name, object_name).size)
+
+    def getobjectproperty(self, window_name, object_name, prop):
+        widget = self._find(window_name, object_name)
+        properties = {'class': widget.role, 'label': widget.label, 'key': widget.name,
+                      'parent': self._window(window_name).name, 'children': ' '.join(widget.children)}
+        if prop not in properties:
+            raise LookupError('Unknown property %s' % prop)
+        return properties[prop]
+
+    def getallstates(self, window_name, object_name):
+        return sorted(self._find(window_name, object_name).states)
+
+    def hasstate(self, window_name, object_name, state, guiTimeOut=0):
+        return self._wait(lambda: self._has_state(window_name, object_name, state), guiTimeOut)
+
+    def stateenabled(self, window_name, object_name):
+        return int('enabled' in self._find(window_name, object_name).states)
+
+    def grabfocus(self, window_name, object_name=''):
+        self._find(window_name, object_name)
+        return 1
+
+    def getobjectnameatcoords(self, waitTime=0):
+        return ['frmCalculator', 'btn1']
+
+    def imagecapture(self, window_name=None, x=0, y=0, width=None, height=None):
+        if window_name:
+            self._window(window_name)
+        return _PNG
+
+    # Buttons, menus and check boxes
+
+    def click(self, window_name, object_name):
+        widget = self._find(window_name, object_name)
+        if widget.role == 'push_button' and widget.label.isdigit():
+            result = self._find(window_name, 'txtResult') if self._has(window_name, 'txtResult') else None
+            if result is not None:
+                result.text = widget.label if result.text == '0' else result.text + widget.label
+        elif widget.role in ('check_box', 'toggle_button', 'check_menu_item'):
+            self._toggle(widget)
+        self._activate(window_name, widget)
+        return 1
+
+    def doubleclick(self, window_name, object_name):
+        return self.click(window_name, object_name)
+
+    def mouseleftclick(self, window_name, object_name):
+        return self.click(window_name, object_name)
+
+    def mouserightclick(self, window_name, object_name):
+        self._find(window_name, object_name)
+        return 1
+
+    def mousemove(self, window_name, object_name):
+        self._find(window_name, object_name)
+        return 1
+
+    def selectmenuitem(self, window_name, object_name):
+        widget = self._menu_item(window_name, object_name)
+        self._activate(window_name, widget)
+        return 1
+
+    def invokemenu(self, window_name, object_name):
+        return self.selectmenuitem(window_name, object_name)
+
+    def doesmenuitemexist(self, window_name, object_name, strict_hierarchy=False):
+        try:
+            self._menu_item(window_name, object_name)
+        except LookupError:
+            return 0
+        return 1
+
+    def menuitemenabled(self, window_name, object_name):
+        return int('enabled' in self._menu_item(window_name, object_name).states)
+
+    def listsubmenus(self, window_name, object_name):
+        return ';'.join(self._menu_item(window_name, object_name).children)
+
+    def menucheck(self, window_name, object_name):
+        self._menu_item(window_name, object_name).states.add('checked')
+        return 1
+
+    def menuuncheck(self, window_name, object_name):
+        self._menu_item(window_name, object_name).states.discard('checked')
+        return 1
+
+    def verifymenucheck(self, window_name, object_name):
+        return int('checked' in self._menu_item(window_name, object_name).states)
+
+    def verifymenuuncheck(self, window_name, object_name):
+        return int('checked' not in self._menu_item(window_name, object_name).states)
+
+    def check(self, window_name, object_name):
+        self._find(window_name, object_name).states.add('checked')
+        return 1
+
+    def uncheck(self, window_name, object_name):
+        self._find(window_name, object_name).states.discard('checked')
+        return 1
+
+    def verifycheck(self, window_name, object_name):
+        return int('checked' in self._find(window_name, object_name).states)
+
+    def verifyuncheck(self, window_name, object_name):
+        return int('checked' not in self._find(window_name, object_name).states)
+
+    def verifybuttoncount(self, window_name, object_name, count):
+        self._find(window_name, object_name)
+        buttons = [widget for widget in self._window(window_name).objects.values() if widget.role == 'push_button']
+        return int(len(buttons) == int(count))
+
+    def verifystatusbarvisible(self, window_name, object_name):
+        return int('showing' in self._find(window_name, object_name).states)
+
+    def selectpanel(self, window_name, object_name, index):
+        self._find(window_name, object_name)
+        return 1
+
+    # Text, combo boxes, tabs and values
+
+    def gettextvalue(self, window_name, object_name, startPosition=0, endPosition=0):
+        text = self._find(window_name, object_name).text
+        if endPosition:
+            return text[int(startPosition):int(endPosition)]
+        return text[int(startPosition):]
+
+    def settextvalue(self, window_name, object_name, data=''):
+        self._find(window_name, object_name).text = data
+        return 1
+
+    def enterstring(self, window_name, object_name='', data=''):
+        if object_name:
+            widget = self._find(window_name, object_name)
+            widget.text += data
+        return 1
+
+    def comboselect(self, window_name, object_name, item_name):
+        widget = self._find(window_name, object_name)
+        widget.text = self._item(widget, item_name)
+        return 1
+
+    def selectitem(self, window_name, object_name, item_name):
+        return self.comboselect(window_name, object_name, item_name)
+
+    def selectindex(self, window_name, object_name, index):
+        widget = self._find(window_name, object_name)
+        widget.text = self._item_at(widget, index)
+        return 1
+
+    def getcombovalue(self, window_name, object_name):
+        return self._find(window_name, object_name).text
+
+    def verifyselect(self, window_name, object_name, item_name):
+        return int(self._find(window_name, object_name).text == item_name)
+
+    def selecttab(self, window_name, object_name, tab_name):
+        widget = self._find(window_name, object_name)
+        widget.text = self._item(widget, tab_name)
+        return 1
+
+    def selecttabindex(self, window_name, object_name, index):
+        return self.selectindex(window_name, object_name, index)
+
+    def gettabname(self, window_name, object_name, index):
+        return self._item_at(self._find(window_name, object_name), index)
+
+    def gettabcount(self, window_name, object_name):
+        return len(self._find(window_name, object_name).items)
+
+    def setvalue(self, window_name, object_name, data):
+        self._find(window_name, object_name).value = float(data)
+        return 1
+
+    def getvalue(self, window_name, object_name):
+        return self._find(window_name, object_name).value
+
+    def getslidervalue(self, window_name, object_name):
+        return self.getvalue(window_name, object_name)
+
+    def increase(self, window_name, object_name, iterations):
+        self._find(window_name, object_name).value += int(iterations)
+        return 1
+
+    def decrease(self, window_name, object_name, iterations):
+        self._find(window_name, object_name).value -= int(iterations)
+        return 1
+
+    # Tables
+
+    def getrowcount(self, window_name, object_name):
+        return len(self._table(window_name, object_name).rows)
+
+    def getcellvalue(self, window_name, object_name, row_index, column=0):
+        return self._cell(self._table(window_name, object_name), row_index, column)
+
+    def setcellvalue(self, window_name, object_name, row_index, column=0, data=None):
+        table = self._table(window_name, object_name)
+        self._cell(table, row_index, column)
+        table.rows[int(row_index)][int(column)] = data
+        return 1
+
+    def getcellsize(self, window_name, object_name, row_index, column=0):
+        self._cell(self._table(window_name, object_name), row_index, column)
+        return [0, int(row_index) * 20, 80, 20]
+
+    def gettablerowindex(self, window_name, object_name, row_text):
+        return self._row(self._table(window_name, object_name), row_text)
+
+    def doesrowexist(self, window_name, object_name, row_text, partial_match=False):
+        try:
+            self._row(self._table(window_name, object_name), row_text, partial_match)
+        except LookupError:
+            return 0
+        return 1
+
+    def selectrow(self, window_name, object_name, row_text, partial_match=False):
+        table = self._table(window_name, object_name)
+        table.selected_rows = set([self._row(table, row_text, partial_match)])
+        return 1
+
+    def selectrowpartialmatch(self, window_name, object_name, row_text):
+        return self.selectrow(window_name, object_name, row_text, True)
+
+    def selectrowindex(self, window_name, object_name, row_index):
+        table = self._table(window_name, object_name)
+        self._cell(table, row_index, 0)
+        table.selected_rows = set([int(row_index)])
+        return 1
+
+    def selectlastrow(self, window_name, object_name):
+        table = self._table(window_name, object_name)
+        if not table.rows:
+            raise LookupError('Table %s is empty' % object_name)
+        table.selected_rows = set([len(table.rows) - 1])
+        return 1
+
+    def multiselect(self, window_name, object_name, row_text_list, partial_match=False):
+        table = self._table(window_name, object_name)
+        table.selected_rows = set(self._row(table, text, partial_match) for text in row_text_list)
+        return 1
+
+    def multiremove(self, window_name, object_name, row_text_list, partial_match=False):
+        table = self._table(window_name, object_name)
+        table.selected_rows -= set(self._row(table, text, partial_match) for text in row_text_list)
+        return 1
+
+    def singleclickrow(self, window_name, object_name, row_text):
+        return self.selectrow(window_name, object_name, row_text)
+
+    def doubleclickrow(self, window_name, object_name, row_text):
+        return self.selectrow(window_name, object_name, row_text)
+
+    def doubleclickrowindex(self, window_name, object_name, row_index, col_index=0):
+        self._cell(self._table(window_name, object_name), row_index, col_index)
+        return 1
+
+    def rightclick(self, window_name, object_name, row_text):
+        self._row(self._table(window_name, object_name), row_text)
+        return 1
+
+    def checkrow(self, window_name, object_name, row_index, column=0):
+        table = self._table(window_name, object_name)
+        self._cell(table, row_index, column)
+        table.checked_rows.add(int(row_index))
+        return 1
+
+    def uncheckrow(self, window_name, object_name, row_index, column=0):
+        table = self._table(window_name, object_name)
+        self._cell(table, row_index, column)
+        table.checked_rows.discard(int(row_index))
+        return 1
+
+    def expendtablecell(self, window_name, object_name, row_index, column=0):
+        self._cell(self._table(window_name, object_name), row_index, column)
+        return 1
+
+    def verifytablecell(self, window_name, object_name, row_index, column, row_text):
+        return int(self._cell(self._table(window_name, object_name), row_index, column) == row_text)
+
+    def verifypartialtablecell(self, window_name, object_name, row_index, column, row_text):
+        return int(row_text in self._cell(self._table(window_name, object_name), row_index, column))
+
+    # Mouse and keyboard
+
+    def generatemouseevent(self, x, y, eventType='b1c', drag_button_override='drag_default_button'):
+        return 1
+
+    def generatekeyevent(self, data):
+        return 1
+
+    def simulatemousemove(self, source_x, source_y, dest_x, dest_y, delay=0.0):
+        return 1
+
+    # Private
+
+    def _live_windows(self):
+        now = time.time()
+        due = [name for when, name in self._pending if when <= now]
+        if due:
+            self._pending = [(when, name) for when, name in self._pending if when > now]
+            for name in due:
+                self._windows[name] = _Window(name, self.templates.get(name, {}))
+        return self._windows
+
+    def _window(self, window_name):
+        with self._lock:
+            windows = self._live_windows()
+            if window_name in windows:
+                return windows[window_name]
+            for name in sorted(windows):
+                if fnmatch.fnmatchcase(name, window_name):
+                    return windows[name]
+        raise LookupError('Unable to find window "%s"' % window_name)
+
+    def _find(self, window_name, object_name=''):
+        window = self._window(window_name)
+        if not object_name:
+            return window
+        if object_name in window.objects:
+            return window.objects[object_name]
+        for name in sorted(window.objects):
+            if fnmatch.fnmatchcase(name, object_name) or window.objects[name].label == object_name:
+                return window.objects[name]
+        raise LookupError('Unable to find object "%s" in window "%s"' % (object_name, window_name))
+
+    def _has(self, window_name, object_name):
+        try:
+            self._find(window_name, object_name)
+        except LookupError:
+            return False
+        return True
+
+    def _exists_with_state(self, window_name, object_name, state):
+        try:
+            widget = self._find(window_name, object_name)
+        except LookupError:
+            return False
+        return not state or state in widget.states
+
+    def _has_state(self, window_name, object_name, state):
+        return state in self._find(window_name, object_name).states
+
+    @staticmethod
+    def _wait(predicate, timeout):
+        deadline = time.time() + float(timeout)
+        while not predicate():
+            if time.time() >= deadline:
+                return 0
+            time.sleep(0.01)
+        return 1
+
+    def _set_window_state(self, window_name, state, enabled):
+        window = self._window(window_name)
+        if enabled:
+            window.states.add(state)
+        else:
+            window.states.discard(state)
+        return 1
+
+    def _menu_item(self, window_name, object_name):
+        return self._find(window_name, object_name.split(';')[-1])
+
+    def _activate(self, window_name, widget):
+        if widget.opens:
+            self.show_window(widget.opens)
+        if widget.closes:
+            self.closewindow(window_name)
+
+    @staticmethod
+    def _toggle(widget):
+        if 'checked' in widget.states:
+            widget.states.discard('checked')
+        else:
+            widget.states.add('checked')
+
+    @staticmethod
+    def _item(widget, item_name):
+        if item_name not in widget.items:
+            raise LookupError('Unable to find item "%s" in "%s"' % (item_name, widget.name))
+        return item_name
+
+    @staticmethod
+    def _item_at(widget, index):
+        try:
+            return widget.items[int(index)]
+        except IndexError:
+            raise LookupError('Index %s out of range in "%s"' % (index, widget.name))
+
+    def _table(self, window_name, object_name):
+        widget = self._find(window_name, object_name)
+        if widget.role not in ('table', 'tree_table'):
+            raise LookupError('Object "%s" is not a table' % object_name)
+        return widget
+
+    @staticmethod
+    def _cell(table, row_index, column):
+        try:
+            return table.rows[int(row_index)][int(column)]
+        except IndexError:
+            raise LookupError('Cell (%s, %s) does not exist in "%s"' % (row_index, column, table.name))
+
+    @staticmethod
+    def _row(table, row_text, partial_match=False):
+        for index, row in enumerate(table.rows):
+            for cell in row:
+                if cell == row_text or (partial_match and row_text in cell):
+                    return index
+        raise LookupError('Unable to find row "%s" in "%s"' % (row_text, table.name))
+
+
+class _KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        SimpleXMLRPCRequestHandler.setup(self)
+        self.server.instance._count('connections')
+
+    def do_POST(self):
+        self.server.instance._count('requests')
+        SimpleXMLRPCRequestHandler.do_POST(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadedXMLRPCServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+    # Concurrent clients open many connections at once.
+    request_queue_size = 64
+
+
+class FakeLdtpServer(object):
+    """Serves a `FakeDesktop` over XML-RPC like ldtpd.
+
+    ``latency`` seconds are added to every call, ``latencies`` maps call
+    names to their own latency, e.g. ``{'imagecapture': 0.05}``. Port 0
+    picks a free port, see ``port`` once started. ``system.multicall`` is
+    only served with ``multicall``, which ldtpd does not have.
+
+    ``call_counts`` counts the calls per method, ``requests`` the HTTP
+    requests and ``connections`` the connections accepted, see `reset`.
+    """
+
+    def __init__(self, desktop=None, address='127.0.0.1', port=0, latency=0.0, latencies=None,
+                 multicall=False):
+        self.desktop = desktop if desktop is not None else FakeDesktop()
+        self.latency = float(latency)
+        self.latencies = dict(latencies or {})
+        self.call_counts = {}
+        self.requests = 0
+        self.connections = 0
+        self._counts_lock = threading.Lock()
+        self._server = _ThreadedXMLRPCServer((address, int(port)), _KeepAliveHandler,
+                                             logRequests=False, allow_none=True)
+        self._server.register_instance(self)
+        self._server.register_introspection_functions()
+        if multicall:
+            self._server.register_multicall_functions()
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def uri(self):
+        return 'http://%s:%d/RPC2' % (self.address, self.port)
+
+    def start(self):
+        """Serves in a background thread and returns the server."""
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def reset(self):
+        """Sets the call, request and connection counts back to zero."""
+        with self._counts_lock:
+            self.call_counts.clear()
+            self.requests = 0
+            self.connections = 0
+
+    def _count(self, name):
+        with self._counts_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _listMethods(self):
+        return [name for name in dir(self.desktop)
+                if not name.startswith('_') and callable(getattr(self.desktop, name))]
+
+    def _dispatch(self, method, params):
+        if method.startswith('_') or not hasattr(self.desktop, method):
+            raise AttributeError('Method %s not implemented' % method)
+        with self._counts_lock:
+            self.call_counts[method] = self.call_counts.get(method, 0) + 1
+        delay = self.latencies.get(method, self.latency)
+        if delay:
+            time.sleep(delay)
+        return getattr(self.desktop, method)(*params)
+
+
+def main():
+    # Not available on Python 2.6, which only needs the classes.
+    import argparse
+    parser = argparse.ArgumentParser(description="Stand-in ldtpd serving an in-memory desktop")
+    parser.add_argument('--address', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4118)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every call')
+    parser.add_argument('--launch-delay', type=float, default=0.0,
+                        help='seconds before the windows of a launched app appear')
+    parser.add_argument('--tree', help='JSON file with {"windows": ..., "apps": ...}')
+    args = parser.parse_args()
+
+    windows = apps = None
+    if args.tree:
+        with open(args.tree) as f:
+            tree = json.load(f)
+        windows, apps = tree.get('windows'), tree.get('apps')
+    desktop = FakeDesktop(windows, apps, launch_delay=args.launch_delay)
+    server = FakeLdtpServer(desktop, args.address, args.port, latency=args.latency)
+    print('Fake ldtpd serving on %s' % server.uri)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
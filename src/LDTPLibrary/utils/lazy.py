@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import threading
+
+__all__ = [
+    "LdtpExecutionError",
+    "LazyLdtp",
+    "ldtp",
+]
+
+_EXCEPTION_MODULE = 'ldtp.client_exception'
+
+
+def import_ldtp():
+    """Imports the ldtp client module, atomac's on OS X."""
+    try:
+        import ldtp
+    except ImportError:
+        if sys.platform != "darwin":
+            raise
+        import atomac.ldtp as ldtp
+    exception_module = sys.modules.get(_EXCEPTION_MODULE)
+    if exception_module is not None and not hasattr(ldtp, 'client_exception'):
+        ldtp.client_exception = exception_module
+    return ldtp
+
+
+def _ldtp_package_dir():
+    # Locates the ldtp package without running its __init__
+    try:
+        from importlib.util import find_spec
+    except ImportError:
+        import imp
+        return imp.find_module('ldtp')[1]
+    spec = find_spec('ldtp')
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError('No module named ldtp')
+    return list(spec.submodule_search_locations)[0]
+
+
+def _load_source(name, path):
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        import imp
+        return imp.load_source(name, path)
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _import_client_exception():
+    # Importing ldtp.client_exception normally runs ldtp/__init__.py, which
+    # lists the methods of ldtpd and so connects to it, or even starts it.
+    # The exception module has no dependencies, it is loaded on its own and
+    # registered under its real name so ldtp reuses it once it is imported.
+    module = sys.modules.get(_EXCEPTION_MODULE)
+    if module is None:
+        try:
+            path = os.path.join(_ldtp_package_dir(), 'client_exception.py')
+            if os.path.isfile(path):
+                module = _load_source(_EXCEPTION_MODULE, path)
+        except Exception:
+            sys.modules.pop(_EXCEPTION_MODULE, None)
+            module = None
+    if module is not None:
+        return module.LdtpExecutionError
+    try:
+        from ldtp.client_exception import LdtpExecutionError
+    except ImportError:
+        try:
+            if sys.platform != "darwin":
+                raise
+            from atomac.ldtp.client_exception import LdtpExecutionError
+        except ImportError:
+            # Without ldtp the library still runs its own clients, against
+            # the stand-in ldtpd or a recording, which raise this instead.
+            class LdtpExecutionError(Exception):
+                pass
+    return LdtpExecutionError
+
+
+class LazyLdtp(object):
+    """Stands in for the ldtp module and imports it on first attribute
+    access, so importing and constructing the library neither connects
+    to ldtpd nor starts it."""
+
+    def __init__(self):
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return '<lazy ldtp module%s>' % ('' if self._module is None else ' (loaded)')
+
+    def close(self):
+        # The ldtp module keeps no connections to close, and there is
+        # nothing to close before it was imported.
+        close = getattr(self._module, 'close', None)
+        if close is not None:
+            close()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = import_ldtp()
+        return self._module
+
+
+LdtpExecutionError = _import_client_exception()
+ldtp = LazyLdtp()
@@ -7,11 +7,20 @@ from .events import *
 class LibraryListener(object):
     ROBOT_LISTENER_API_VERSION = 2
 
+    def __init__(self, suite_end=()):
+        # Suite end actions of the library owning this listener. They are not
+        # put in the process-wide event registry, so every library only runs
+        # its own and nothing keeps a discarded library alive.
+        self._suite_end_actions = list(suite_end)
+
     def start_suite(self, name, attrs):
         dispatch('scope_start', attrs['longname'])
 
     def end_suite(self, name, attrs):
         dispatch('scope_end', attrs['longname'])
+        dispatch('suite_end', attrs['longname'])
+        for action in self._suite_end_actions:
+            action()
 
     def start_test(self, name, attrs):
         dispatch('scope_start', attrs['longname'])
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import re
+import fnmatch
+import threading
+import six
+from .client import run_batch
+from .lazy import LdtpExecutionError
+
+__all__ = [
+    "Locator",
+    "LocatorClient",
+    "compile_pattern",
+    "is_glob",
+    "match_name",
+    "same_window",
+]
+
+# ldtp names windows and objects by a role prefix and their label, e.g.
+# frmCalculator or btnOK.
+_ROLE_PREFIX = re.compile(r'^[a-z]{3}(?=[A-Z0-9])')
+_GLOB_CHARS = re.compile(r'[*?\[]')
+_MAX_PATTERNS = 1024
+_patterns = {}
+
+# Calls whose first argument is not a window, whose second one is not an
+# object, and calls answering 0 rather than failing when a resolved name
+# went stale, which are always sent with the names as given.
+_NO_WINDOW_CALLS = frozenset(['launchapp', 'generatekeyevent', 'generatemouseevent', 'simulatemousemove',
+                              'wait', 'getwindowlist', 'registerevent', 'deregisterevent',
+                              'registerkbevent', 'deregisterkbevent', 'getobjectnameatcoords',
+                              'guiexist', 'objectexist', 'waittillguiexist', 'waittillguinotexist'])
+_NO_OBJECT_CALLS = frozenset(['imagecapture', 'imagecapture_data', 'onwindowcreate', 'windowuptime'])
+_WINDOW_CHANGING_CALLS = frozenset(['launchapp', 'closewindow'])
+
+
+def compile_pattern(pattern):
+    """Returns the regular expression of the glob ``pattern``, compiled
+    once per pattern. Spaces are ignored like in ldtp names."""
+    regex = _patterns.get(pattern)
+    if regex is None:
+        if len(_patterns) >= _MAX_PATTERNS:
+            _patterns.clear()
+        regex = _patterns[pattern] = re.compile(fnmatch.translate(pattern.replace(' ', '')))
+    return regex
+
+
+def match_name(pattern, name):
+    """Tells whether ``name``, a window or object name as listed by ldtpd,
+    matches ``pattern``, an ldtp name, a label without spaces or a Unix
+    glob of either."""
+    regex = compile_pattern(pattern)
+    return regex.match(name) is not None or regex.match(_ROLE_PREFIX.sub('', name, 1)) is not None
+
+
+def is_glob(name):
+    return isinstance(name, six.string_types) and _GLOB_CHARS.search(name) is not None
+
+
+def same_window(name, other):
+    """Tells whether the window names ``name`` and ``other`` may stand for
+    the same window, e.g. ``frmCalculator`` and ``Calculator``. Globs may
+    stand for any window."""
+    if is_glob(name) or is_glob(other):
+        return True
+    return _ROLE_PREFIX.sub('', name.replace(' ', ''), 1) == _ROLE_PREFIX.sub('', other.replace(' ', ''), 1)
+
+
+class Locator(object):
+    """Resolves window and object name globs into the concrete names
+    ldtpd lists, remembering every resolution until `invalidate`.
+
+    The first listed name matching a pattern wins, as with ldtpd.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._windows = {}
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def window(self, pattern, fetch):
+        """Returns the window matching ``pattern`` among ``fetch()``, the
+        window list, or None if there is none."""
+        return self._resolve(self._windows, pattern, pattern, fetch)
+
+    def object(self, window_name, pattern, fetch):
+        """Returns the object of ``window_name`` matching ``pattern``
+        among ``fetch()``, its object list, or None if there is none."""
+        return self._resolve(self._objects, (window_name, pattern), pattern, fetch)
+
+    def invalidate(self, *args):
+        with self._lock:
+            self._windows.clear()
+            self._objects.clear()
+
+    # Private
+
+    def _resolve(self, resolved, key, pattern, fetch):
+        with self._lock:
+            if key in resolved:
+                self.hits += 1
+                return resolved[key]
+            self.misses += 1
+        name = None
+        for candidate in fetch():
+            if match_name(pattern, candidate):
+                name = candidate
+                break
+        if name is not None:
+            with self._lock:
+                if len(resolved) >= _MAX_PATTERNS:
+                    resolved.clear()
+                resolved[key] = name
+        return name
+
+
+class LocatorClient(object):
+    """Wraps an LDTP client and replaces glob window and object names in
+    the calls with the concrete names `Locator` resolved them to, so ldtpd
+    does not match the pattern against the whole desktop on every call.
+
+    Names without glob characters and patterns matching nothing are sent
+    as given, and so are existence checks and waits. A call failing with
+    resolved names, e.g. because the window was closed, drops the
+    resolutions and is retried once with the original names. Launching an
+    application or closing a window drops them as well.
+    """
+
+    def __init__(self, client, locator):
+        self._client = client
+        self._locator = locator
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        window_changing = name in _WINDOW_CHANGING_CALLS
+
+        def call(*args, **kwargs):
+            resolved, resolved_kwargs = self._resolve(name, args, kwargs)
+            try:
+                return attr(*resolved, **resolved_kwargs)
+            except LdtpExecutionError:
+                if resolved == args and resolved_kwargs == kwargs:
+                    raise
+                self._locator.invalidate()
+                return attr(*args, **kwargs)
+            finally:
+                if window_changing:
+                    self._locator.invalidate()
+        return call
+
+    def batch(self, calls):
+        try:
+            return run_batch(self._client, [(name, self._resolve(name, tuple(args), {})[0]) for name, args in calls])
+        finally:
+            if any(name in _WINDOW_CHANGING_CALLS for name, _ in calls):
+                self._locator.invalidate()
+
+    def close(self):
+        close = getattr(self._client, 'close', None)
+        if close is not None:
+            close()
+
+    # Private
+
+    def _resolve(self, name, args, kwargs):
+        # Names are passed positionally or as window_name and object_name,
+        # e.g. imagecapture(window_name=..., out_file=...).
+        if name in _NO_WINDOW_CALLS or not (args or 'window_name' in kwargs):
+            return args, kwargs
+        window_name = args[0] if args else kwargs['window_name']
+        object_name = args[1] if len(args) > 1 else kwargs.get('object_name')
+        try:
+            if is_glob(window_name):
+                window_name = self._locator.window(window_name, self._client.getwindowlist)
+                if window_name is None:
+                    return args, kwargs
+            if is_glob(object_name) and ';' not in object_name and name not in _NO_OBJECT_CALLS:
+                object_name = self._locator.object(window_name, object_name,
+                                                   lambda: self._client.getobjectlist(window_name)) or object_name
+        except LdtpExecutionError:
+            # Left to ldtpd, which reports the error of the call itself.
+            return args, kwargs
+        resolved, resolved_kwargs = list(args), dict(kwargs)
+        if args:
+            resolved[0] = window_name
+        else:
+            resolved_kwargs['window_name'] = window_name
+        if len(args) > 1:
+            resolved[1] = object_name
+        elif 'object_name' in kwargs:
+            resolved_kwargs['object_name'] = object_name
+        return tuple(resolved), resolved_kwargs
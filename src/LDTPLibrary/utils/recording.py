@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import time
+import threading
+from .client import run_batch
+from .lazy import LdtpExecutionError
+
+__all__ = [
+    "CallRecorder",
+    "RecordingClient",
+    "ReplayClient",
+]
+
+
+class CallRecorder(object):
+    """Appends LDTP calls to ``path``, one JSON array per line:
+    ``[method, args, result, error, latency]``, followed by ``kwargs`` for
+    calls made with keyword arguments.
+
+    ``error`` is the ldtpd error message of a failed call and ``None``
+    otherwise, ``latency`` the seconds the call took. Lines are written as
+    the calls return, so a recording cut short by a crash is still usable.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.calls = 0
+        self._file = open(path, 'a')
+        self._lock = threading.Lock()
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def record(self, name, args, result, error, latency, kwargs=None):
+        call = [name, list(args), result, error, round(latency, 6)]
+        if kwargs:
+            call.append(kwargs)
+        line = json.dumps(call, separators=(',', ':'), default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.calls += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingClient(object):
+    """Wraps an LDTP client and writes every call made through it, with its
+    result or error and latency, to ``recorder``, a `CallRecorder`. Once
+    the recorder is closed calls are passed through unrecorded.
+    """
+
+    def __init__(self, client, recorder):
+        self.client = client
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            if self._recorder.closed:
+                return attr(*args, **kwargs)
+            start = time.time()
+            try:
+                result = attr(*args, **kwargs)
+            except LdtpExecutionError as e:
+                self._recorder.record(name, args, None, str(e), time.time() - start, kwargs)
+                raise
+            self._recorder.record(name, args, result, None, time.time() - start, kwargs)
+            return result
+        return call
+
+    def close(self):
+        close = getattr(self.client, 'close', None)
+        if close is not None:
+            close()
+
+    def batch(self, calls):
+        start = time.time()
+        outcomes = run_batch(self.client, calls)
+        if not self._recorder.closed and outcomes:
+            # A batch is a single round trip, its calls share the latency.
+            latency = (time.time() - start) / len(outcomes)
+            for (name, args), (result, error) in zip(calls, outcomes):
+                self._recorder.record(name, args, result, error, latency)
+        return outcomes
+
+
+class ReplayClient(object):
+    """Answers LDTP calls from a recording written by `CallRecorder`,
+    without any ldtpd or desktop.
+
+    Recorded calls are indexed by method and arguments, keyword arguments
+    included. Repeated calls get the recorded responses in order, and the
+    last one once those run out, so polling keywords such as ``Wait Till
+    Gui Exist`` replay as they ran.
+    With ``simulate_latency`` every call sleeps for its recorded latency.
+    """
+
+    thread_safe = True
+
+    def __init__(self, path, simulate_latency=False):
+        self.uri = 'replay:%s' % path
+        self.simulate_latency = simulate_latency
+        self.calls = 0
+        self._responses = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                call = json.loads(line)
+                name, args, result, error, latency = call[:5]
+                kwargs = call[5] if len(call) > 5 else None
+                self._responses.setdefault(self._key(name, args, kwargs), []).append((result, error, latency))
+
+    def __len__(self):
+        return sum(len(responses) for responses in self._responses.values())
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            result, error = self._respond(name, args, kwargs)
+            if error is not None:
+                raise LdtpExecutionError(error)
+            return result
+        return call
+
+    def batch(self, calls):
+        return [self._respond(name, args) for name, args in calls]
+
+    def close(self):
+        pass
+
+    # Private
+
+    @staticmethod
+    def _key(name, args, kwargs=None):
+        return name, json.dumps([list(args), kwargs or {}], separators=(',', ':'), sort_keys=True, default=str)
+
+    def _respond(self, name, args, kwargs=None):
+        key = self._key(name, args, kwargs)
+        responses = self._responses.get(key)
+        if not responses:
+            return None, 'No recorded response for %s%r%s' % (name, tuple(args), ' %r' % kwargs if kwargs else '')
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.calls += 1
+        result, error, latency = responses[min(position, len(responses) - 1)]
+        if self.simulate_latency and latency:
+            time.sleep(latency)
+        return result, error
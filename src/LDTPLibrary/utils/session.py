@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import atexit
+import socket
+import subprocess
+import threading
+
+__all__ = [
+    "LDTPSession",
+    "LDTPSessionPool",
+    "normalize_display",
+    "pabot_worker_index",
+    "server_is_listening",
+]
+
+BASE_DISPLAY = 100
+BASE_PORT = 4119
+DEFAULT_LDTPD_COMMAND = [sys.executable, '-c', 'import ldtpd; ldtpd.main(port=%(port)d)']
+
+_running_sessions = set()
+_running_sessions_lock = threading.Lock()
+
+
+def normalize_display(display):
+    """Returns ``display`` in the ``:N`` form of the ``DISPLAY`` variable,
+    ``5`` and ``:5`` both give ``:5``."""
+    display = str(display).strip()
+    if display and ':' not in display:
+        display = ':' + display
+    return display
+
+
+def pabot_worker_index():
+    """Returns the execution pool id pabot gave to the current process, or 0
+    when not running under pabot."""
+    index = os.environ.get('PABOTEXECUTIONPOOLID')
+    if index is None:
+        try:
+            from robot.libraries.BuiltIn import BuiltIn
+            index = BuiltIn().get_variable_value('${PABOTEXECUTIONPOOLID}')
+        except Exception:
+            index = None
+    try:
+        return int(index)
+    except (TypeError, ValueError):
+        return 0
+
+
+def server_is_listening(address, port, timeout=0.5):
+    """Tells whether something accepts TCP connections on ``address:port``."""
+    try:
+        connection = socket.create_connection((address, int(port)), timeout)
+    except (socket.error, socket.timeout):
+        return False
+    connection.close()
+    return True
+
+
+class LDTPSession(object):
+    """A headless Xvfb display with its own ldtpd listening on ``port``.
+
+    ``display`` and ``port`` default to a pair derived from
+    `pabot_worker_index`, so every pabot worker gets its own desktop,
+    e.g. display ``:100`` and port 4119 for the first worker, ``:101`` and
+    4120 for the second. ``ldtpd_command`` is the command starting ldtpd,
+    ``%(port)d`` in it is replaced with the port. ldtpd needs an
+    accessibility bus, when the runner has no session bus wrap the command
+    with e.g. ``dbus-run-session --``.
+    """
+
+    def __init__(self, display=None, port=None, screen='1280x1024x24', xvfb_command='Xvfb',
+                 ldtpd_command=None, startup_timeout=30):
+        index = pabot_worker_index() if display is None or port is None else 0
+        self.display = normalize_display(display if display is not None else BASE_DISPLAY + index)
+        self.port = int(port if port is not None else BASE_PORT + index)
+        self.address = 'localhost'
+        self.screen = screen
+        self.xvfb_command = xvfb_command
+        self.ldtpd_command = list(ldtpd_command or DEFAULT_LDTPD_COMMAND)
+        self.startup_timeout = float(startup_timeout)
+        self._xvfb = None
+        self._ldtpd = None
+
+    def __repr__(self):
+        return '<LDTPSession %s on port %d>' % (self.display, self.port)
+
+    @property
+    def uri(self):
+        return 'http://%s:%d/RPC2' % (self.address, self.port)
+
+    def start(self):
+        """Starts Xvfb and ldtpd and returns once ldtpd accepts connections."""
+        if self.is_alive():
+            return self
+        self.stop()
+        environ = dict(os.environ, DISPLAY=self.display, LDTP_SERVER_PORT=str(self.port))
+        devnull = open(os.devnull, 'wb')
+        try:
+            self._xvfb = subprocess.Popen([self.xvfb_command, self.display, '-screen', '0', self.screen,
+                                           '-nolisten', 'tcp'], stdout=devnull, stderr=devnull)
+            self._wait_for(self._display_ready, 'Xvfb on display %s' % self.display, self._xvfb)
+            command = [part % {'port': self.port} for part in self.ldtpd_command]
+            self._ldtpd = subprocess.Popen(command, env=environ, stdout=devnull, stderr=devnull)
+            self._wait_for(lambda: server_is_listening(self.address, self.port),
+                           'ldtpd on port %d' % self.port, self._ldtpd)
+        except Exception:
+            self.stop()
+            raise
+        finally:
+            devnull.close()
+        with _running_sessions_lock:
+            _running_sessions.add(self)
+        return self
+
+    def stop(self):
+        """Stops ldtpd and Xvfb, if they are running."""
+        for process in (self._ldtpd, self._xvfb):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                deadline = time.time() + 5
+                while process.poll() is None and time.time() < deadline:
+                    time.sleep(0.05)
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+        self._ldtpd = self._xvfb = None
+        with _running_sessions_lock:
+            _running_sessions.discard(self)
+
+    def is_alive(self):
+        """Tells whether both Xvfb and ldtpd of this session still run and
+        the X socket of the display still exists."""
+        return all(process is not None and process.poll() is None
+                   for process in (self._xvfb, self._ldtpd)) and self._display_ready()
+
+    # Private
+
+    def _display_ready(self):
+        number = self.display.split(':', 1)[1].split('.')[0]
+        return os.path.exists('/tmp/.X11-unix/X%s' % number)
+
+    def _wait_for(self, predicate, what, process):
+        deadline = time.time() + self.startup_timeout
+        while not predicate():
+            if process.poll() is not None:
+                raise RuntimeError('%s exited with code %s while starting.' % (what, process.returncode))
+            if time.time() > deadline:
+                raise RuntimeError('%s did not start in %s seconds.' % (what, self.startup_timeout))
+            time.sleep(0.05)
+
+
+class LDTPSessionPool(object):
+    """Starts ``size`` `LDTPSession` desktops and hands them out one at a time.
+
+    Sessions are numbered from ``display`` and ``port``, offset by
+    ``size`` times the pabot execution pool id so the pools of parallel
+    workers do not overlap. A session found dead when it is checked out,
+    including one whose X socket was removed, is recycled, i.e. its Xvfb
+    and ldtpd are restarted, before it is handed out. Other keyword
+    arguments are passed to every `LDTPSession`.
+    """
+
+    def __init__(self, size=2, display=None, port=None, **session_options):
+        size = int(size)
+        offset = pabot_worker_index() * size
+        display = int(normalize_display(display).lstrip(':')) if display is not None else BASE_DISPLAY
+        port = int(port) if port is not None else BASE_PORT
+        self.sessions = [LDTPSession(display + offset + index, port + offset + index, **session_options)
+                         for index in range(size)]
+        self.recycled = 0
+        self._free = []
+        self._condition = threading.Condition()
+
+    def start(self):
+        """Starts all sessions in parallel, stopping them all if one fails."""
+        errors = []
+
+        def start(session):
+            try:
+                session.start()
+            except Exception as err:
+                errors.append(err)
+        threads = [threading.Thread(target=start, args=(session,)) for session in self.sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            self.stop()
+            raise errors[0]
+        with self._condition:
+            self._free = list(self.sessions)
+        return self
+
+    def checkout(self, timeout=None):
+        """Returns a free, healthy session, waiting up to ``timeout`` seconds
+        for one to be checked in when all are in use."""
+        deadline = None if timeout is None else time.time() + float(timeout)
+        with self._condition:
+            while not self._free:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise RuntimeError('No free LDTP session in %s seconds.' % timeout)
+                self._condition.wait(remaining)
+            session = self._free.pop(0)
+        try:
+            if not self.is_healthy(session):
+                self.recycle(session)
+        except Exception:
+            self.checkin(session)
+            raise
+        return session
+
+    def checkin(self, session):
+        with self._condition:
+            if session in self.sessions and session not in self._free:
+                self._free.append(session)
+                self._condition.notify()
+
+    @staticmethod
+    def is_healthy(session):
+        return session.is_alive() and server_is_listening(session.address, session.port)
+
+    def recycle(self, session):
+        """Restarts the Xvfb and ldtpd of ``session``."""
+        session.stop()
+        session.start()
+        self.recycled += 1
+
+    def stop(self):
+        with self._condition:
+            self._free = []
+        for session in self.sessions:
+            session.stop()
+
+
+@atexit.register
+def _stop_running_sessions():
+    # Sessions outliving the Robot process would keep their display and
+    # port busy for the next run.
+    with _running_sessions_lock:
+        sessions = list(_running_sessions)
+    for session in sessions:
+        session.stop()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import csv
+import json
+import threading
+import six
+
+__all__ = [
+    "KeywordTimings",
+]
+
+_PERCENTILES = (50, 90, 95, 99)
+_FIELDS = ['keyword', 'count', 'total', 'min', 'max', 'mean'] + ['p%d' % p for p in _PERCENTILES]
+
+
+class KeywordTimings(object):
+    """Collects the latency of every keyword call.
+
+    With ``per_argument`` the calls are also recorded per first two
+    keyword arguments, which are the window and object name for most
+    keywords, e.g. as ``click (frmCalculator, btn1)``.
+    """
+
+    def __init__(self, per_argument=False):
+        self.per_argument = per_argument
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, arguments=()):
+        with self._lock:
+            self._samples.setdefault(name, []).append(elapsed)
+            if self.per_argument and arguments:
+                key = '%s (%s)' % (name, ', '.join(six.text_type(arg) for arg in arguments))
+                self._samples.setdefault(key, []).append(elapsed)
+
+    def statistics(self):
+        """Returns a dictionary mapping each keyword to its call count and
+        total, min, max, mean and percentile latencies in seconds."""
+        with self._lock:
+            samples = dict((name, sorted(values)) for name, values in self._samples.items())
+        statistics = {}
+        for name, values in samples.items():
+            count = len(values)
+            total = sum(values)
+            stats = {'count': count, 'total': total, 'min': values[0],
+                     'max': values[-1], 'mean': total / count}
+            for percentile in _PERCENTILES:
+                # Nearest rank percentile
+                rank = max(int(-(-percentile * count // 100)), 1)
+                stats['p%d' % percentile] = values[rank - 1]
+            statistics[name] = stats
+        return statistics
+
+    def write_report(self, path):
+        """Writes the statistics to ``path``, as CSV if it ends with
+        ``.csv`` and as JSON otherwise."""
+        statistics = self.statistics()
+        if not path.lower().endswith('.csv'):
+            with open(path, 'w') as f:
+                json.dump(statistics, f, indent=2, sort_keys=True)
+            return
+        if six.PY2:
+            f = open(path, 'wb')
+        else:
+            f = open(path, 'w', newline='')
+        with f:
+            writer = csv.writer(f)
+            writer.writerow(_FIELDS)
+            for name in sorted(statistics, key=lambda n: -statistics[n]['total']):
+                row = dict(statistics[name], keyword=name)
+                if six.PY2:
+                    row['keyword'] = six.text_type(name).encode('utf-8')
+                writer.writerow([row[field] for field in _FIELDS])
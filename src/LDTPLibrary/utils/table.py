@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from .cache import changed_window, is_read_only
+from .client import run_batch
+from .lazy import LdtpExecutionError
+from .locator import same_window
+
+__all__ = [
+    "IndexedClient",
+    "RowIndex",
+    "iter_table_chunks",
+    "probe_columns",
+]
+
+
+def probe_columns(client, window_name, object_name, row_index=0, max_columns=None):
+    """Returns the column indexes of a table, found by reading cells of
+    ``row_index`` until the first column that fails, or until
+    ``max_columns`` columns were found. The cells are read in batches
+    starting at four cells and doubling, so wide tables take a few
+    requests and narrow ones do not read many cells past their last
+    column, which matters for clients calling ldtpd once per cell."""
+    columns = []
+    size = 4
+    while max_columns is None or len(columns) < max_columns:
+        end = len(columns) + size
+        if max_columns is not None:
+            end = min(end, int(max_columns))
+        calls = [('getcellvalue', [window_name, object_name, row_index, column])
+                 for column in range(len(columns), end)]
+        for column, (_, error) in zip(range(len(columns), end), run_batch(client, calls)):
+            if error is not None:
+                return columns
+            columns.append(column)
+        size *= 2
+    return columns
+
+
+def iter_table_chunks(client, window_name, object_name, start_row=0, end_row=None,
+                      columns=None, chunk_size=500):
+    """Reads a table in batches of ``chunk_size`` rows.
+
+    Yields ``(first_row, chunk)`` pairs where ``chunk`` maps each column
+    index to the list of its cell values for the rows of that chunk, so
+    only one chunk is held in memory at a time. ``end_row`` defaults to the
+    row count of the table and ``columns`` to every column of the table.
+    """
+    start_row = int(start_row)
+    chunk_size = int(chunk_size)
+    if end_row is None:
+        end_row = client.getrowcount(window_name, object_name)
+    end_row = int(end_row)
+    if start_row >= end_row:
+        return
+    if columns is None:
+        columns = probe_columns(client, window_name, object_name, start_row)
+    columns = [int(column) for column in columns]
+    for first_row in range(start_row, end_row, chunk_size):
+        calls = [('getcellvalue', [window_name, object_name, row, column])
+                 for row in range(first_row, min(first_row + chunk_size, end_row))
+                 for column in columns]
+        chunk = dict((column, []) for column in columns)
+        for (_, args), (result, error) in zip(calls, run_batch(client, calls)):
+            if error is not None:
+                raise LdtpExecutionError("get cell value (%d, %d) failed: %s" % (args[2], args[3], error))
+            chunk[args[3]].append(result)
+        yield first_row, chunk
+
+
+class RowIndex(object):
+    """Row text index of a table, built from `iter_table_chunks` output.
+
+    Answers which row holds a cell equal to, or containing, a text without
+    asking ldtpd, which otherwise scans the whole table for every lookup.
+    """
+
+    def __init__(self, chunks):
+        self.row_count = 0
+        self._exact = {}
+        self._partial = {}
+        self._cells = []
+        for first_row, chunk in chunks:
+            columns = sorted(chunk)
+            for offset, texts in enumerate(zip(*[chunk[column] for column in columns])):
+                row = first_row + offset
+                for text in texts:
+                    self._exact.setdefault(text, row)
+                    self._cells.append((text, row))
+                self.row_count = row + 1
+
+    def find(self, row_text, partial_match=False):
+        """Returns the first row with a cell equal to ``row_text``, or
+        containing it if ``partial_match`` is true, None if there is none."""
+        if not partial_match:
+            return self._exact.get(row_text)
+        if row_text not in self._partial:
+            self._partial[row_text] = None
+            for text, row in self._cells:
+                if row_text in text:
+                    self._partial[row_text] = row
+                    break
+        return self._partial[row_text]
+
+
+class IndexedClient(object):
+    """Wraps an LDTP client and drops the row indexes in ``indexes``, a
+    dictionary of `RowIndex` keyed by ``(window, table)``, whenever a call
+    not known to be read-only may have changed their rows. Like with
+    `PropertyClient`, that is the indexes of the window the call was made
+    on, or all of them when it does not act on one window.
+    """
+
+    def __init__(self, client, indexes):
+        self._client = client
+        self._indexes = indexes
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr) or is_read_only(name):
+            return attr
+
+        def call(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._invalidate(name, args)
+        return call
+
+    def batch(self, calls):
+        try:
+            return run_batch(self._client, calls)
+        finally:
+            for name, args in calls:
+                if not is_read_only(name):
+                    self._invalidate(name, args)
+
+    def close(self):
+        close = getattr(self._client, 'close', None)
+        if close is not None:
+            close()
+
+    # Private
+
+    def _invalidate(self, name, args):
+        if not self._indexes:
+            return
+        window_name = changed_window(name, args)
+        for key in list(self._indexes):
+            if window_name is None or same_window(key[0], window_name):
+                self._indexes.pop(key, None)
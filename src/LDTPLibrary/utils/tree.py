@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import io
+import gzip
+import json
+from array import array
+from .client import run_batch
+from .lazy import LdtpExecutionError
+
+__all__ = [
+    "WindowTree",
+]
+
+_FIELDS = ('name', 'role', 'label', 'states', 'size', 'parent')
+
+
+class WindowTree(object):
+    """Snapshot of the objects of one window, held in parallel arrays.
+
+    Every object has a name, role, label, states, size ``[x, y, width,
+    height]`` and parent, the parent being another object of the window or
+    ``None`` for objects directly under the window. Roles and state sets
+    are stored once and referenced by index, sizes and parent links as
+    integer arrays, so large dialogs stay small in memory.
+
+    ``tree['btn1']`` returns an object as a dictionary, iterating yields
+    all of them in ldtpd order. ``errors`` maps the names of the objects
+    some of whose values could not be read, and are left empty, to the
+    errors of those calls.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.errors = {}
+        self.names = []
+        self.labels = []
+        self.role_names = []
+        self.state_sets = []
+        self._roles = array('H')
+        self._states = array('H')
+        self._sizes = array('i')
+        self._parents = array('i')
+        self._index = {}
+        self._role_ids = {}
+        self._state_ids = {}
+
+    @classmethod
+    def fetch(cls, client, window_name, chunk_size=100):
+        """Reads the tree of ``window_name`` from ldtpd, batching the five
+        calls per object of ``chunk_size`` objects into one request.
+
+        Fails with LdtpExecutionError when the window can not be read, or
+        was closed while it was read, rather than returning a partial tree.
+        """
+        tree = cls(window_name)
+        names = client.getobjectlist(window_name)
+        parents = []
+        chunk_size = max(int(chunk_size), 1)
+        for first in range(0, len(names), chunk_size):
+            chunk = names[first:first + chunk_size]
+            calls = []
+            for name in chunk:
+                calls.extend([('getobjectproperty', [window_name, name, 'class']),
+                              ('getobjectproperty', [window_name, name, 'label']),
+                              ('getobjectproperty', [window_name, name, 'parent']),
+                              ('getallstates', [window_name, name]),
+                              ('getobjectsize', [window_name, name])])
+            outcomes = run_batch(client, calls)
+            results = [result for result, _ in outcomes]
+            for offset, name in enumerate(chunk):
+                role, label, parent, states, size = results[offset * 5:offset * 5 + 5]
+                tree._append(name, role or '', label or '', states or (), size or (0, 0, 0, 0))
+                parents.append(parent)
+                errors = ['%s: %s' % (field, error) for field, (_, error)
+                          in zip(('role', 'label', 'parent', 'states', 'size'), outcomes[offset * 5:offset * 5 + 5])
+                          if error is not None]
+                if errors:
+                    tree.errors[name] = errors
+        if tree.errors and not client.guiexist(window_name):
+            raise LdtpExecutionError('Window %s was closed while its tree was read' % window_name)
+        tree._link(parents)
+        return tree
+
+    @classmethod
+    def read(cls, path):
+        """Reads a tree written by `write`."""
+        with cls._open(path, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            tree = cls(header['window'])
+            tree.errors = header.get('errors', {})
+            parents = []
+            for line in f:
+                name, role, label, states, size, parent = json.loads(line.decode('utf-8'))
+                tree._append(name, role, label, states, size)
+                parents.append(parent)
+        tree._link(parents)
+        return tree
+
+    def write(self, path):
+        """Writes the tree to ``path`` as JSON lines, a header followed by
+        one ``[name, role, label, states, size, parent]`` array per object,
+        so two snapshots diff line by line. The header holds the ``errors``
+        too. The file is gzip compressed when ``path`` ends with ``.gz``."""
+        with self._open(path, 'wb') as f:
+            f.write(self._line({'window': self.window, 'objects': len(self), 'fields': _FIELDS,
+                                'errors': self.errors}))
+            for index in range(len(self)):
+                f.write(self._line(self._record(index)))
+        return path
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield dict(zip(_FIELDS, self._record(index)))
+
+    def __getitem__(self, name):
+        return dict(zip(_FIELDS, self._record(self._index[name])))
+
+    def children(self, name=None):
+        """Returns the names of the objects whose parent is ``name``, or
+        that are directly under the window when ``name`` is None."""
+        parent = -1 if name is None else self._index[name]
+        return [self.names[index] for index, value in enumerate(self._parents) if value == parent]
+
+    def find(self, role=None, state=None):
+        """Returns the names of the objects with ``role`` and ``state``."""
+        role_index = self._role_ids.get(role)
+        if role is not None and role_index is None:
+            return []
+        matches = []
+        for index, name in enumerate(self.names):
+            if role is not None and self._roles[index] != role_index:
+                continue
+            if state is not None and state not in self.state_sets[self._states[index]]:
+                continue
+            matches.append(name)
+        return matches
+
+    # Private
+
+    def _append(self, name, role, label, states, size):
+        self._index[name] = len(self.names)
+        self.names.append(name)
+        self.labels.append(label)
+        self._roles.append(self._intern(role, self.role_names, self._role_ids))
+        self._states.append(self._intern(tuple(sorted(states)), self.state_sets, self._state_ids))
+        self._sizes.extend(int(value) for value in (list(size) + [0, 0, 0, 0])[:4])
+
+    @staticmethod
+    def _intern(value, values, ids):
+        if value not in ids:
+            ids[value] = len(values)
+            values.append(value)
+        return ids[value]
+
+    def _link(self, parents):
+        # ldtpd names the window, or nothing, as parent of top level objects.
+        self._parents = array('i', [self._index.get(parent, -1) for parent in parents])
+
+    def _record(self, index):
+        parent = self._parents[index]
+        return [self.names[index], self.role_names[self._roles[index]], self.labels[index],
+                list(self.state_sets[self._states[index]]), list(self._sizes[index * 4:index * 4 + 4]),
+                self.names[parent] if parent >= 0 else None]
+
+    @staticmethod
+    def _line(value):
+        return (json.dumps(value, separators=(',', ':')) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _open(path, mode):
+        if path.endswith('.gz'):
+            return gzip.open(path, mode)
+        return io.open(path, mode)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+import threading
+
+__all__ = [
+    "GuiWaiter",
+]
+
+
+class GuiWaiter(object):
+    """Waits for GUI conditions on the client side.
+
+    The condition is polled with an exponential backoff starting at
+    ``initial_interval`` seconds and growing by ``factor`` up to
+    ``max_interval``, so a window showing up after 50 ms is noticed
+    within a few milliseconds instead of at ldtpd's next one second tick.
+    Calling `notify`, e.g. from an ldtp window event callback, wakes all
+    waiters up at once and restarts their backoff.
+    """
+
+    def __init__(self, initial_interval=0.005, max_interval=0.25, factor=2):
+        self.initial_interval = float(initial_interval)
+        self.max_interval = float(max_interval)
+        self.factor = float(factor)
+        self._generation = 0
+        self._condition = threading.Condition()
+
+    def wait_until(self, predicate, timeout):
+        """Returns True as soon as ``predicate()`` is true, or False once
+        ``timeout`` seconds have passed without it being true."""
+        deadline = time.time() + float(timeout)
+        interval = self.initial_interval
+        while True:
+            generation = self._generation
+            if predicate():
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            with self._condition:
+                if generation == self._generation:
+                    self._condition.wait(min(interval, remaining))
+                if generation == self._generation:
+                    interval = min(interval * self.factor, self.max_interval)
+                else:
+                    interval = self.initial_interval
+
+    def notify(self, *args):
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
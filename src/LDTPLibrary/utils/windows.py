@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+import threading
+from .cache import is_read_only
+from .client import run_batch
+from .locator import match_name
+
+__all__ = [
+    "TrackedClient",
+    "WindowRegistry",
+]
+
+
+class WindowRegistry(object):
+    """Names of the top level windows of the desktop, re-read from ldtpd
+    once they are older than ``max_age`` seconds or were invalidated.
+    """
+
+    def __init__(self, max_age=1.0):
+        self.max_age = float(max_age)
+        self.refreshes = 0
+        self._names = None
+        self._read_at = 0
+        self._lock = threading.Lock()
+
+    def names(self, fetch, max_age=None):
+        """Returns the window names, calling ``fetch`` for a fresh list
+        when the known one is older than ``max_age`` seconds, which
+        defaults to the ``max_age`` of the registry."""
+        max_age = self.max_age if max_age is None else float(max_age)
+        with self._lock:
+            if self._names is not None and time.time() - self._read_at <= max_age:
+                return list(self._names)
+        names = list(fetch())
+        with self._lock:
+            self._names = names
+            self._read_at = time.time()
+            self.refreshes += 1
+        return list(names)
+
+    def expire(self, max_age):
+        """Makes the next `names` re-read the list if it is older than
+        ``max_age`` seconds."""
+        with self._lock:
+            if time.time() - self._read_at > float(max_age):
+                self._read_at = 0
+
+    def match(self, pattern, fetch):
+        """Returns the names of the windows matching ``pattern``."""
+        return [name for name in self.names(fetch) if match_name(pattern, name)]
+
+    def invalidate(self, *args):
+        with self._lock:
+            self._read_at = 0
+
+
+class TrackedClient(object):
+    """Wraps an LDTP client and answers ``getwindowlist`` and ``guiexist``
+    of a window from ``registry``, a `WindowRegistry`, matching window
+    names with `match_name`. Any call not known to be read-only may
+    have opened or closed windows and invalidates the registry.
+    """
+
+    def __init__(self, client, registry):
+        self._client = client
+        self._registry = registry
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr) or is_read_only(name):
+            return attr
+
+        def call(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._registry.invalidate()
+        return call
+
+    def getwindowlist(self):
+        return self._registry.names(self._client.getwindowlist)
+
+    def guiexist(self, window_name, object_name=''):
+        if object_name:
+            return self._client.guiexist(window_name, object_name)
+        return int(bool(self._registry.match(window_name, self._client.getwindowlist)))
+
+    def batch(self, calls):
+        try:
+            return run_batch(self._client, calls)
+        finally:
+            if not all(is_read_only(name) for name, _ in calls):
+                self._registry.invalidate()
+
+    def close(self):
+        close = getattr(self._client, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Starts stand-in ldtpd servers of LDTPLibrary.utils.fakeldtpd in the Robot
+process, so performance.robot can count the calls and requests they get.
+"""
+
+import sys
+from LDTPLibrary.utils import is_truthy
+from LDTPLibrary.utils.fakeldtpd import FakeDesktop, FakeLdtpServer
+
+
+class FakeServers(object):
+    ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+    def __init__(self):
+        self._servers = {}
+
+    def start_fake_ldtpd(self, port, multicall=False, latency=0, launch_delay=0, **latencies):
+        """Starts a stand-in ldtpd on ``port``, answering ``system.multicall``
+        with ``multicall``. Named arguments give the latency of single calls,
+        e.g. ``gettextvalue=0.2``."""
+        desktop = FakeDesktop(launch_delay=launch_delay)
+        server = FakeLdtpServer(desktop, port=int(port), latency=latency,
+                                latencies=dict((name, float(value)) for name, value in latencies.items()),
+                                multicall=is_truthy(multicall))
+        self._servers[int(port)] = server.start()
+
+    def stop_fake_ldtpds(self):
+        for server in self._servers.values():
+            server.stop()
+        self._servers.clear()
+
+    def reset_fake_ldtpd_counts(self, port):
+        self._servers[int(port)].reset()
+
+    def get_fake_ldtpd_call_count(self, port, method):
+        return self._servers[int(port)].call_counts.get(method, 0)
+
+    def get_fake_ldtpd_request_count(self, port):
+        return self._servers[int(port)].requests
+
+    def get_fake_ldtpd_connection_count(self, port):
+        return self._servers[int(port)].connections
+
+    def show_window_on_fake_ldtpd(self, port, window_name):
+        """Opens a window behind the back of the library."""
+        self._servers[int(port)].desktop.show_window(window_name)
+
+    def close_window_on_fake_ldtpd(self, port, window_name):
+        """Closes a window behind the back of the library."""
+        self._servers[int(port)].desktop.closewindow(window_name)
+
+    def get_text_values_with_async_client(self, port, window_name, *object_names):
+        """Reads the texts of ``object_names`` concurrently with
+        `LDTPLibrary.aio.AsyncLDTPKeywords` and returns them in order."""
+        if sys.version_info < (3, 5):
+            raise RuntimeError('LDTPLibrary.aio requires Python 3.5 or newer.')
+        import asyncio
+        from LDTPLibrary.aio import AsyncLDTPKeywords
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        ldtp = AsyncLDTPKeywords('127.0.0.1', int(port))
+        try:
+            reads = asyncio.gather(*[ldtp.get_text_value(window_name, name) for name in object_names])
+            return list(loop.run_until_complete(reads))
+        finally:
+            ldtp.close()
+            asyncio.set_event_loop(None)
+            loop.close()
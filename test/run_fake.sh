@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+# Runs fake.robot against the stand-in ldtpd, no desktop or ldtpd needed.
+# performance.robot starts its own stand-in servers through FakeServers.py.
+
+python -m LDTPLibrary.utils.fakeldtpd --port 4118 &
+server=$!
+trap "kill $server" EXIT
+sleep 1
+pybot fake.robot performance.robot